@@ -0,0 +1,59 @@
+"""
+Compares collector latency with sequential per-repo requests against the
+concurrent asyncio collectors, using a local mock API with fixed latency
+
+Usage: python -m benchmarks.bench_async_collectors [repo_count] [latency_ms]
+"""
+import os
+import sys
+import time
+
+# Both passes start cold: no response cache or commit store on disk
+os.environ.update({'GITHUB_CACHE': '0', 'GITHUB_COMMIT_STORE': '0'})
+
+from benchmarks.mock_api import SyntheticUser, start_server
+from github_api import http_client, rate_limit, async_client, commit_cache, issue_cache
+from github_api import popularity_data, activity_data, code_quality_data, collaboration_data
+
+COLLECTORS = [
+    ('popularity', popularity_data.get_popularity_data),
+    ('activity', activity_data.get_activity_data),
+    ('code_quality', code_quality_data.get_code_quality_data),
+    ('collaboration', collaboration_data.get_collaboration_data),
+]
+
+def time_collectors(username: str) -> dict:
+    timings = {}
+    for name, collector in COLLECTORS:
+        commit_cache.clear()
+        issue_cache.clear()
+        start = time.perf_counter()
+        collector(username)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+def main():
+    repo_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    user = SyntheticUser('bench-user', repo_count)
+    server, base_url = start_server([user], latency=latency)
+    http_client.base_url = base_url
+    # The mock API accepts any token; without one requests are paced at the anonymous limit
+    rate_limit.configure(['mock-token'])
+    http_client.configure_pool(pool_maxsize=async_client.GLOBAL_CONCURRENCY)
+
+    async_client.configure(global_concurrency=1, user_concurrency=1)
+    sequential = time_collectors(user.username)
+    async_client.configure()
+    concurrent = time_collectors(user.username)
+    server.shutdown()
+
+    print(f"{repo_count} repos, {latency * 1000:.0f} ms per request, "
+          f"user concurrency {async_client.USER_CONCURRENCY}")
+    print(f"{'collector':<15}{'sequential':>12}{'concurrent':>12}{'speedup':>10}")
+    for name, _ in COLLECTORS:
+        print(f"{name:<15}{sequential[name]:>11.2f}s{concurrent[name]:>11.2f}s"
+              f"{sequential[name] / concurrent[name]:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares scoring a cohort one user at a time with scoring.calculate_grade
+against cohort_scoring.calculate_grades, and checks both give identical results
+
+Usage: python -m benchmarks.bench_cohort_scoring [profile_count]
+"""
+import sys
+import time
+import numpy as np
+from protos import GithubGrader_pb2
+from scoring import calculate_grade
+from cohort_scoring import calculate_grades, get_columns
+
+LANGUAGES = ['Python', 'Go', 'Rust', 'C', 'TypeScript', 'Java', 'Shell', 'HTML']
+
+def make_profiles(count: int, seed: int = 0):
+    """
+    Random ProfileReply messages, with some empty sections and some values on
+    the clamp and grade boundaries
+    """
+    rng = np.random.default_rng(seed)
+    empty = rng.random((count, 4)) < 0.1
+    boundary_changes = rng.choice([4.5, 5, 10, 200, 200.5, 500, 600], count)
+    profiles = []
+    for index in range(count):
+        profile = GithubGrader_pb2.ProfileReply(username=f'user{index}')
+        if not empty[index, 0]:
+            profile.activity.total_commits = int(rng.integers(0, 2000))
+            profile.activity.consistency_score = float(rng.uniform(0, 100))
+            profile.activity.recent_activity_score = int(rng.integers(0, 60))
+            profile.activity.active_days = int(rng.integers(0, 91))
+        if not empty[index, 1]:
+            profile.popularity.stars = int(rng.integers(0, 500))
+            profile.popularity.avg_stars = float(rng.uniform(0, 40))
+            profile.popularity.followers = int(rng.integers(0, 400))
+            profile.popularity.avg_watchers = float(rng.uniform(0, 15))
+        if not empty[index, 2]:
+            profile.code_quality.commit_message_quality_score = float(rng.uniform(0, 100))
+            for language in rng.choice(LANGUAGES, int(rng.integers(0, 8)), replace=False):
+                profile.code_quality.primary_languages[str(language)] = int(rng.integers(1, 10 ** 6))
+            if index % 5 == 0:
+                profile.code_quality.avg_additions_per_commit = float(boundary_changes[index])
+            else:
+                profile.code_quality.avg_additions_per_commit = float(rng.uniform(0, 400))
+                profile.code_quality.avg_deletions_per_commit = float(rng.uniform(0, 200))
+        if not empty[index, 3]:
+            profile.collaboration.total_prs = int(rng.integers(0, 40))
+            profile.collaboration.pr_merge_rate = float(rng.uniform(0, 1))
+            profile.collaboration.total_issues = int(rng.integers(0, 40))
+            profile.collaboration.issue_close_rate = float(rng.uniform(0, 1))
+        profiles.append(profile)
+    return profiles
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    profiles = make_profiles(count)
+
+    start = time.perf_counter()
+    scalar = [calculate_grade(profile.activity, profile.popularity, profile.code_quality, profile.collaboration)
+              for profile in profiles]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = get_columns(profiles)
+    columns_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = calculate_grades(**columns)
+    vectorized_time = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for index, result in enumerate(scalar)
+        if result['total_score'] != vectorized['total_score'][index]
+        or result['grade'] != vectorized['grade'][index]
+        or any(result['breakdown'][section] != vectorized['breakdown'][section][index]
+               for section in result['breakdown'])
+    )
+
+    print(f"{count} profiles")
+    print(f"scalar calculate_grade:      {scalar_time:8.3f}s")
+    print(f"columns from ProfileReply:   {columns_time:8.3f}s")
+    print(f"vectorized calculate_grades: {vectorized_time:8.3f}s ({scalar_time / vectorized_time:.1f}x)")
+    print(f"mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares scoring commit messages one at a time with the original per-message
+scorer against code_quality_data.score_commit_messages, in-process and in
+worker processes, and checks every score is identical
+
+Usage: python -m benchmarks.bench_commit_messages [message_count] [processes]
+"""
+import os
+import random
+import re
+import sys
+import time
+from github_api import code_quality_data
+from github_api.code_quality_data import analyze_commit_message_quality, score_commit_messages
+
+# Messages that repeat across most repositories
+COMMON_MESSAGES = [
+    'Update README.md', 'Initial commit', 'wip', 'fix', 'Merge branch \'main\' of github.com:user/repo',
+    'Merge pull request #1 from user/patch-1', 'Add files via upload', 'update', 'changes', 'Create LICENSE',
+]
+WORDS = ['add', 'fix', 'update', 'remove', 'refactor', 'implement', 'parser', 'cache', 'tests', 'docs',
+         'handle', 'error', 'in', 'the', 'for', 'api', 'client', 'config', 'typo', 'build', 'Bump', 'Improve']
+PREFIXES = ['', '', '', 'feat: ', 'fix(api): ', 'chore: ', 'docs(readme): ', 'Style: ', 'perf: ']
+
+def score_message_reference(message):
+    """
+    score_single_commit_message as it was before batch scoring, kept to check the results
+    """
+    if not message or len(message.strip()) == 0:
+        return 0
+
+    message = message.strip()
+    score = 0
+
+    if len(message) >= 50:
+        score += 25
+    elif len(message) >= 20:
+        score += 15
+    elif len(message) >= 10:
+        score += 10
+    else:
+        score += 5
+
+    if message[0].isupper():
+        score += 15
+
+    action_verbs = ['add', 'fix', 'update', 'remove', 'refactor', 'implement',
+                   'create', 'delete', 'modify', 'improve', 'optimize']
+    first_word = message.split()[0].lower()
+    if first_word in action_verbs:
+        score += 20
+
+    lazy_patterns = ['wip', 'test', 'asdf', 'update', 'fix', 'changes', 'stuff']
+    if message.lower() in lazy_patterns:
+        score -= 10
+    elif len(message.split()) >= 3:
+        score += 15
+
+    conventional_pattern = r'^(feat|fix|docs|style|refactor|test|chore)(\(.+\))?: .+'
+    if re.match(conventional_pattern, message, re.IGNORECASE):
+        score += 20
+
+    return max(0, min(100, score))
+
+def make_corpus(count: int, seed: int = 0):
+    """
+    About half common messages and half generated ones, with merge numbers,
+    whitespace, empty and multi-line messages mixed in
+    """
+    rnd = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        kind = rnd.random()
+        if kind < 0.45:
+            message = rnd.choice(COMMON_MESSAGES)
+        elif kind < 0.55:
+            message = f'Merge pull request #{rnd.randint(1, 5000)} from user/feature-{rnd.randint(1, 300)}'
+        elif kind < 0.57:
+            message = rnd.choice(['', '   ', '\n', ' WIP ', 'Fix\n\nDetails follow'])
+        else:
+            words = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 12)))
+            message = rnd.choice(PREFIXES) + words
+            if rnd.random() < 0.1:
+                message += '\n\n' + ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 30)))
+            if rnd.random() < 0.05:
+                message = f'  {message}\t'
+        messages.append(message)
+    return messages
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else min(4, os.cpu_count() or 1)
+    messages = make_corpus(count)
+
+    start = time.perf_counter()
+    reference = [score_message_reference(message) for message in messages]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = score_commit_messages(messages, processes=1)
+    batch_time = time.perf_counter() - start
+
+    code_quality_data._score_stripped_message.cache_clear()
+    threshold = code_quality_data.MESSAGE_PROCESS_THRESHOLD
+    code_quality_data.MESSAGE_PROCESS_THRESHOLD = 0
+    start = time.perf_counter()
+    parallel = score_commit_messages(messages, processes=processes)
+    parallel_time = time.perf_counter() - start
+    code_quality_data.MESSAGE_PROCESS_THRESHOLD = threshold
+
+    mismatches = sum(1 for scores in (batch, parallel)
+                     for expected, score in zip(reference, scores) if expected != score)
+    reference_quality = round(sum(reference) / len(messages), 2)
+    if reference_quality != analyze_commit_message_quality(messages):
+        mismatches += 1
+
+    print(f"{count} messages, {len(set(messages))} distinct")
+    print(f"per-message reference:       {reference_time:8.3f}s")
+    print(f"batch, in-process:           {batch_time:8.3f}s ({reference_time / batch_time:.1f}x)")
+    print(f"batch, {processes} processes:          {parallel_time:8.3f}s ({reference_time / parallel_time:.1f}x)")
+    print(f"mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
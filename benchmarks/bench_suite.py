@@ -0,0 +1,252 @@
+"""
+Benchmark suite at three levels, each case run in a fresh process:
+- micro: score_single_commit_message, calculate_consistency_score and calculate_grade
+- collectors: every get_*_data against the mock API, for users of increasing repository counts
+- e2e: server.py graded over gRPC by grader.py-style clients, collecting from the mock API
+
+Every case reports wall time, HTTP requests and response bytes seen by the mock
+API, and peak RSS (plus the server's for e2e). Results are written as JSON;
+with --compare, cases whose wall time grew by more than --tolerance or that
+send more requests or bytes than the earlier results fail the run
+
+Usage: python -m benchmarks.bench_suite [--levels micro collectors e2e] [--repos 10 100 1000]
+                                        [--output FILE] [--compare OLD_FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+# Every case runs cold: no response cache, commit store or commit details on disk
+os.environ.update({'GITHUB_CACHE': '0', 'GITHUB_COMMIT_STORE': '0', 'GITHUB_COMMIT_DETAILS': '0'})
+
+import grpc
+from benchmarks.mock_api import SyntheticUser, start_server, get_server_stats, reset_server_stats
+from benchmarks.bench_commit_messages import make_corpus
+from benchmarks.bench_cohort_scoring import make_profiles
+from github_api import http_client, rate_limit, commit_cache, issue_cache
+from github_api import popularity_data, activity_data, code_quality_data, collaboration_data
+from github_api.commit_cache import parse_commit
+import grader
+from scoring import calculate_grade
+
+LEVELS = ['micro', 'collectors', 'e2e']
+REPO_COUNTS = [10, 100, 1000]
+COLLECTORS = {
+    'popularity': popularity_data.get_popularity_data,
+    'activity': activity_data.get_activity_data,
+    'code_quality': code_quality_data.get_code_quality_data,
+    'collaboration': collaboration_data.get_collaboration_data,
+}
+# Quota the mock API grants, high enough that no case waits on rate limits
+MOCK_RATE_LIMITS = {bucket: (10 ** 7, 3600) for bucket in rate_limit.DEFAULT_LIMITS}
+SERVER_START_TIMEOUT = 30
+
+def get_peak_rss(who=resource.RUSAGE_SELF) -> int:
+    """
+    Peak resident set size in KB (ru_maxrss is in bytes on macOS)
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def start_mock(users, latency: float):
+    server, base_url = start_server(users, latency=latency, rate_limits=MOCK_RATE_LIMITS)
+    http_client.base_url = base_url
+    rate_limit.configure(['bench-token'])
+    return server, base_url
+
+def run_micro(name: str, size: int) -> dict:
+    if name == 'score_single_commit_message':
+        messages = make_corpus(size)
+        code_quality_data._score_stripped_message.cache_clear()
+        start = time.perf_counter()
+        for message in messages:
+            code_quality_data.score_single_commit_message(message)
+    elif name == 'calculate_consistency_score':
+        user = SyntheticUser('micro', 50, 200)
+        commits = [parse_commit(commit) for repo in user.repos for commit in user.commits(repo['name'])]
+        start = time.perf_counter()
+        for _ in range(size):
+            activity_data.calculate_consistency_score(commits)
+    else:
+        profiles = make_profiles(size)
+        start = time.perf_counter()
+        for profile in profiles:
+            calculate_grade(profile.activity, profile.popularity, profile.code_quality, profile.collaboration)
+    return {'wall_time': time.perf_counter() - start, 'requests': 0, 'response_bytes': 0}
+
+def run_collector(name: str, repo_count: int, latency: float) -> dict:
+    user = SyntheticUser(f'bench-{repo_count}', repo_count)
+    server, _ = start_mock([user], latency)
+    commit_cache.clear()
+    issue_cache.clear()
+    start = time.perf_counter()
+    COLLECTORS[name](user.username)
+    wall_time = time.perf_counter() - start
+    stats = get_server_stats(server)
+    server.shutdown()
+    return {'wall_time': wall_time, **stats}
+
+def get_free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def grade_concurrently(port: int, usernames, clients: int):
+    """
+    clients threads, each with its own channel, fetching complete profiles as grader.py does
+    """
+    def client(index):
+        with grpc.insecure_channel(f'localhost:{port}') as channel:
+            for username in usernames[index::clients]:
+                grader.get_grade(grader.fetch_complete_profile(channel, username))
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def grade_batch(port: int, usernames):
+    """
+    One GradeUsers stream over every user, as grader.py --batch does
+    """
+    with grpc.insecure_channel(f'localhost:{port}') as channel:
+        for profile in grader.grade_users(channel, usernames):
+            grader.build_report(profile)
+
+def run_e2e(name: str, user_count: int, repo_count: int, latency: float, clients: int) -> dict:
+    users = [SyntheticUser(f'e2e-{index}', repo_count) for index in range(user_count)]
+    mock, base_url = start_mock(users, latency)
+    port = get_free_port()
+    env = {**os.environ, 'GITHUB_API_URL': base_url, 'GITHUB_KEY': 'bench-token'}
+    for name_to_drop in ('GITHUB_KEYS', 'GRADER_REPORT_STORE', 'GRADER_WATCHLIST'):
+        env.pop(name_to_drop, None)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, 'server.py', '--port', str(port)], cwd=root, env=env,
+                              stdout=subprocess.DEVNULL)
+    try:
+        with grpc.insecure_channel(f'localhost:{port}') as channel:
+            grpc.channel_ready_future(channel).result(timeout=SERVER_START_TIMEOUT)
+        reset_server_stats(mock)
+        usernames = [user.username for user in users]
+        start = time.perf_counter()
+        if name == 'complete_profile':
+            grade_concurrently(port, usernames, clients)
+        else:
+            grade_batch(port, usernames)
+        wall_time = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+        mock.shutdown()
+    return {'wall_time': wall_time, **get_server_stats(mock),
+            'server_peak_rss_kb': get_peak_rss(resource.RUSAGE_CHILDREN)}
+
+def run_case(level: str, name: str, params: dict) -> dict:
+    """
+    Runs one case; called in a fresh process so peak RSS belongs to that case alone
+    """
+    runner = {'micro': run_micro, 'collectors': run_collector, 'e2e': run_e2e}[level]
+    result = runner(name, **params)
+    return {'level': level, 'name': name, 'params': params, **result, 'peak_rss_kb': get_peak_rss()}
+
+def get_cases(args):
+    cases = []
+    if 'micro' in args.levels:
+        cases += [('micro', 'score_single_commit_message', {'size': 200000}),
+                  ('micro', 'calculate_consistency_score', {'size': 200}),
+                  ('micro', 'calculate_grade', {'size': 20000})]
+    if 'collectors' in args.levels:
+        cases += [('collectors', name, {'repo_count': repo_count, 'latency': args.latency / 1000})
+                  for repo_count in args.repos for name in COLLECTORS]
+    if 'e2e' in args.levels:
+        params = {'user_count': args.users, 'repo_count': args.user_repos, 'latency': args.latency / 1000}
+        cases += [('e2e', 'complete_profile', {**params, 'clients': args.clients}),
+                  ('e2e', 'grade_users', {**params, 'clients': 1})]
+    return cases
+
+def get_git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def get_case_key(result: dict) -> str:
+    return f"{result['level']}/{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+def compare(results, baseline, tolerance: float):
+    """
+    Prints every case next to the same case of an earlier run
+    Returns the cases that regressed
+    """
+    previous = {get_case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(get_case_key(result))
+        if old is None:
+            continue
+        ratio = result['wall_time'] / old['wall_time'] if old['wall_time'] else 1.0
+        slower = ratio > 1 + tolerance
+        more_traffic = result['requests'] > old['requests'] or result['response_bytes'] > old['response_bytes']
+        flag = ' REGRESSION' if slower or more_traffic else ''
+        print(f"{get_case_key(result)}: {ratio:.2f}x wall time, "
+              f"requests {old['requests']} -> {result['requests']}, "
+              f"bytes {old['response_bytes']} -> {result['response_bytes']}{flag}")
+        if flag:
+            regressions.append(get_case_key(result))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Github Grader benchmark suite")
+    parser.add_argument('--levels', nargs='*', choices=LEVELS, default=LEVELS)
+    parser.add_argument('--repos', type=int, nargs='*', default=REPO_COUNTS,
+                        help="repository counts of the collector benchmark users")
+    parser.add_argument('--latency', type=float, default=0, help="milliseconds the mock API adds to every response")
+    parser.add_argument('--users', type=int, default=8, help="users graded by the e2e benchmarks")
+    parser.add_argument('--user-repos', type=int, default=30, help="repositories of each e2e user")
+    parser.add_argument('--clients', type=int, default=4, help="concurrent clients of the e2e benchmark")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', metavar='OLD_FILE', help="results of an earlier run to check against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="wall time growth allowed by --compare")
+    args = parser.parse_args()
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for level, name, params in get_cases(args):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_case, level, name, params).result()
+        results.append(result)
+        print(f"{get_case_key(result)}: {result['wall_time']:.3f}s, {result['requests']} requests, "
+              f"{result['response_bytes']} bytes, peak RSS {result['peak_rss_kb']} KB", flush=True)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': get_git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressed cases")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Runs the REST and GraphQL backends against the same account and checks that
+they fill the same section dicts
+
+By default the account is a synthetic user on the local mock API. With
+--replay, both backends are answered only from a recording, such as the
+fixture in benchmarks/fixtures made with --record; a request missing from the
+recording fails the check. --record runs the check through the recording proxy,
+against the synthetic user or, with --upstream https://api.github.com and a
+GITHUB_KEY, against a real account
+
+Usage: python -m benchmarks.check_graphql_backend [repo_count] [commits_per_repo]
+       python -m benchmarks.check_graphql_backend --record FILE [--user LOGIN] [--upstream URL]
+       python -m benchmarks.check_graphql_backend --replay FILE [--user LOGIN]
+"""
+import argparse
+import os
+import sys
+
+# The synthetic history is dated from now, so a commit store or response cache
+# left by an earlier run would mix stale commits into the REST crawl
+os.environ.update({'GITHUB_CACHE': '0', 'GITHUB_COMMIT_STORE': '0'})
+
+from benchmarks.mock_api import SyntheticUser, start_server
+from github_api import http_client, rate_limit, commit_cache, issue_cache, rest_backend, graphql_backend
+
+# Fields the GraphQL backend fills from data the REST list endpoints do not return
+GRAPHQL_ONLY_FIELDS = {'avg_pr_size'}
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'graphql_parity.jsonl')
+FIXTURE_USER = 'parity-user'
+
+def run(backend, username):
+    commit_cache.clear()
+    issue_cache.clear()
+    http_client.reset_connection_stats()
+    profile = backend.get_complete_profile_data(username)
+    requests = sum(stats['requests'] for stats in http_client.get_connection_stats().values())
+    return profile, requests
+
+def compare_backends(username: str) -> bool:
+    """
+    Collects username with both backends from http_client.base_url and prints the differences
+    Returns True when every metric matches
+    """
+    rest_profile, rest_requests = run(rest_backend, username)
+    graphql_profile, graphql_requests = run(graphql_backend, username)
+
+    mismatches = []
+    for section in ('popularity', 'activity', 'code_quality', 'collaboration'):
+        for field, value in rest_profile[section].items():
+            if field not in GRAPHQL_ONLY_FIELDS and graphql_profile[section][field] != value:
+                mismatches.append((section, field, value, graphql_profile[section][field]))
+
+    print(f"REST requests: {rest_requests}, GraphQL requests: {graphql_requests}")
+    for section, field, rest_value, graphql_value in mismatches:
+        print(f"MISMATCH {section}.{field}: rest={rest_value} graphql={graphql_value}")
+    if not rest_profile['repositories']:
+        print("MISMATCH no repositories were collected")
+        return False
+    return not mismatches and rest_profile['repositories'] == graphql_profile['repositories']
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the GraphQL backend matches REST")
+    parser.add_argument('repo_count', type=int, nargs='?', default=250)
+    parser.add_argument('commits_per_repo', type=int, nargs='?', default=320)
+    parser.add_argument('--record', metavar='FILE', help="record every response of the check into FILE")
+    parser.add_argument('--replay', metavar='FILE', help="answer the check only from the recording in FILE")
+    parser.add_argument('--upstream', help="API recorded by --record instead of a synthetic user")
+    parser.add_argument('--user', help="account to check (default: the synthetic or fixture user)")
+    args = parser.parse_args()
+
+    servers = []
+    username = args.user or (FIXTURE_USER if args.record or args.replay else 'graphql-user')
+    if args.replay:
+        server, base_url = start_server([], recording=args.replay, rate_limited=False)
+        servers.append(server)
+        print(f"Replaying {args.replay}")
+    else:
+        upstream = args.upstream
+        if not upstream:
+            user = SyntheticUser(username, args.repo_count, args.commits_per_repo)
+            server, upstream = start_server([user])
+            servers.append(server)
+            print(f"{args.repo_count} repos, {args.commits_per_repo} commits per repo")
+        base_url = upstream
+        if args.record:
+            # A fresh recording, so it holds exactly the requests of this check
+            if os.path.exists(args.record):
+                os.remove(args.record)
+            server, base_url = start_server([], recording=args.record, upstream=upstream, rate_limited=False)
+            servers.append(server)
+    http_client.base_url = base_url
+    # The mock API accepts any token; without one requests are paced at the anonymous limit
+    rate_limit.configure(rate_limit.TOKENS if args.upstream else ['mock-token'])
+
+    matched = compare_backends(username)
+    for server in servers:
+        server.shutdown()
+    if args.record:
+        print(f"Recorded {args.record}")
+    if not matched:
+        sys.exit(1)
+    print("GraphQL backend matches REST")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,629 @@
+"""
+Local stand-in for the Github REST and GraphQL APIs, so the server and the
+collectors can be run and benchmarked offline without spending real quota
+
+It serves deterministic SyntheticUsers, or replays responses recorded from the
+real API, with pagination Link headers, per-token X-RateLimit-* headers and a
+configurable latency and jitter
+
+Usage: python -m benchmarks.mock_api [--repos 10 1000 10000] [--latency ms] [--jitter ms] [--port port]
+       python -m benchmarks.mock_api --record github.jsonl [--upstream https://api.github.com]
+       python -m benchmarks.mock_api --replay github.jsonl
+then point the server at it with GITHUB_API_URL=http://127.0.0.1:{port}
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode
+import requests
+from github_api import rate_limit
+
+MESSAGES = [
+    'Fix off-by-one error in pagination', 'Update README.md', 'wip',
+    'feat(api): add commit detail endpoint', 'Refactor scoring helpers into module',
+    'Merge pull request #12 from feature/cache', 'fix', 'Add tests for parser',
+]
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', 'C', 'TypeScript', 'Shell']
+# Repository counts of the generated users, from a typical account to an organisation-sized one
+GENERATED_REPO_COUNTS = [10, 1000, 10000]
+# Response headers kept in a recording; rate limit headers are generated on replay
+RECORDED_HEADERS = ['Content-Type', 'Link', 'ETag', 'Last-Modified']
+
+class SyntheticUser:
+    """
+    Deterministic fake Github account with a given number of repositories
+    """
+    def __init__(self, username: str, repo_count: int, commits_per_repo: int = 120, seed: int = 0,
+                 issues_per_repo: int = None):
+        self.username = username
+        self.random = random.Random(f'{username}:{seed}')
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.repos = [self._make_repo(index) for index in range(repo_count)]
+        self._repos_by_name = {repo['name']: repo for repo in self.repos}
+        self.commits_per_repo = commits_per_repo
+        self.issues_per_repo = issues_per_repo
+        self._commits = {}
+        # Commits by (repository, sha) for the single-commit endpoint
+        self._commits_by_sha = {}
+        self._issues = {}
+        self._lock = threading.Lock()
+
+    def _make_repo(self, index: int) -> dict:
+        pushed_at = self.now - timedelta(days=self.random.randint(0, 400))
+        return {
+            'name': f'repo-{index}',
+            'full_name': f'{self.username}/repo-{index}',
+            'stargazers_count': self.random.randint(0, 200),
+            'watchers_count': self.random.randint(0, 200),
+            'forks_count': self.random.randint(0, 20),
+            'language': self.random.choice(LANGUAGES),
+            'pushed_at': pushed_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+
+    def repo(self, name: str):
+        """
+        Repository by name, or None when the user has no such repository
+        """
+        return self._repos_by_name.get(name)
+
+    def profile(self) -> dict:
+        return {
+            'login': self.username,
+            'followers': len(self.repos) * 3,
+            'following': 10,
+            'public_repos': len(self.repos),
+        }
+
+    def commits(self, repo: str) -> list:
+        with self._lock:
+            if repo not in self._commits:
+                rnd = random.Random(f'{self.username}/{repo}')
+                date = self.now
+                commits = []
+                for index in range(self.commits_per_repo):
+                    date -= timedelta(hours=rnd.randint(1, 60))
+                    commits.append(self._make_commit(repo, index, rnd.choice(MESSAGES), date))
+                self._commits[repo] = commits
+                self._commits_by_sha.update(((repo, commit['sha']), commit) for commit in commits)
+            return self._commits[repo]
+
+    def _make_commit(self, repo: str, index: int, message: str, date: datetime) -> dict:
+        date = date.strftime('%Y-%m-%dT%H:%M:%SZ')
+        return {
+            'sha': hashlib.sha1(f'{self.username}/{repo}/{index}'.encode()).hexdigest(),
+            'commit': {
+                'message': message,
+                'author': {'date': date},
+                'committer': {'date': date},
+            },
+        }
+
+    def push(self, repo: str, count: int):
+        """
+        Adds count new commits on top of a repository's history, dated after its newest commit
+        """
+        commits = self.commits(repo)
+        with self._lock:
+            newest = datetime.strptime(commits[0]['commit']['committer']['date'], '%Y-%m-%dT%H:%M:%SZ') \
+                if commits else self.now.replace(tzinfo=None)
+            new = [self._make_commit(repo, len(commits) + index, self.random.choice(MESSAGES),
+                                     newest + timedelta(minutes=count - index))
+                   for index in range(count)]
+            self._commits[repo] = new + commits
+            self._commits_by_sha.update(((repo, commit['sha']), commit) for commit in new)
+            if repo in self._repos_by_name:
+                self._repos_by_name[repo]['pushed_at'] = new[0]['commit']['committer']['date']
+
+    def commit(self, repo: str, sha: str):
+        """
+        Single-commit view with stats derived from the sha, or None for an unknown sha
+        """
+        self.commits(repo)
+        commit = self._commits_by_sha.get((repo, sha))
+        if commit is None:
+            return None
+        additions, deletions = int(sha[:4], 16) % 300, int(sha[4:8], 16) % 120
+        return {**commit, 'stats': {'additions': additions, 'deletions': deletions,
+                                    'total': additions + deletions}}
+
+    def languages(self, repo: str) -> dict:
+        rnd = random.Random(f'{self.username}/{repo}/languages')
+        return {language: rnd.randint(100, 50000) for language in rnd.sample(LANGUAGES, 3)}
+
+    def issues(self, repo: str) -> list:
+        """
+        Issues and pull requests of a repository, newest first, as the issue listing returns them
+        """
+        with self._lock:
+            if repo not in self._issues:
+                rnd = random.Random(f'{self.username}/{repo}/issues')
+                count = rnd.randint(0, 12) if self.issues_per_repo is None else self.issues_per_repo
+                items = []
+                for number in range(count, 0, -1):
+                    updated_at = self.now - timedelta(days=rnd.randint(1, 300), minutes=number)
+                    item = {'number': number, 'state': rnd.choice(['open', 'closed']), 'comments': rnd.randint(0, 6),
+                            'updated_at': updated_at.strftime('%Y-%m-%dT%H:%M:%SZ')}
+                    if rnd.random() < 0.4:
+                        merged = item['state'] == 'closed' and rnd.random() < 0.7
+                        item['pull_request'] = {'merged_at': '2024-01-01T00:00:00Z' if merged else None}
+                    items.append(item)
+                self._issues[repo] = items
+            return self._issues[repo]
+
+    def close_issues(self, repo: str, count: int) -> int:
+        """
+        Closes (merging pull requests) up to count open items, which updates them now
+        Returns the number of items closed
+        """
+        updated_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        items = self.issues(repo)
+        closed = 0
+        with self._lock:
+            for item in items:
+                if closed < count and item['state'] == 'open':
+                    item['state'] = 'closed'
+                    item['updated_at'] = updated_at
+                    if 'pull_request' in item:
+                        item['pull_request']['merged_at'] = updated_at
+                    closed += 1
+        return closed
+
+    def pulls(self, repo: str) -> list:
+        return [{'number': item['number'], 'state': item['state'], 'comments': item['comments'],
+                 'merged_at': item['pull_request']['merged_at']}
+                for item in self.issues(repo) if 'pull_request' in item]
+
+def generate_users(repo_counts=GENERATED_REPO_COUNTS, commits_per_repo: int = 120, seed: int = 0):
+    """
+    One SyntheticUser per repository count, named after it (synthetic-10, synthetic-1000, ...)
+    Commits and issues are generated on first request, so large users are cheap to create
+    """
+    return [SyntheticUser(f'synthetic-{count}', count, commits_per_repo, seed) for count in repo_counts]
+
+class RateLimitWindows:
+    """
+    Github's primary rate limits: a fixed window per token and resource, with
+    the quota of rate_limit.DEFAULT_LIMITS unless overridden
+    Requests without a token get the anonymous quota
+    """
+    def __init__(self, limits: dict = None):
+        self.limits = {**rate_limit.DEFAULT_LIMITS, **(limits or {})}
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def take(self, token, resource: str):
+        """
+        Counts one request against token's resource quota
+        Returns its X-RateLimit-* headers and whether the request may be served
+        """
+        limits = self.limits if token else rate_limit.ANONYMOUS_LIMITS
+        limit, window = limits.get(resource, limits['core'])
+        now = time.time()
+        with self._lock:
+            reset, used = self._windows.get((token, resource), (0, 0))
+            if now >= reset:
+                reset, used = int(now + window), 0
+            allowed = used < limit
+            if allowed:
+                used += 1
+            self._windows[(token, resource)] = (reset, used)
+        return {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(limit - used),
+            'X-RateLimit-Used': str(used),
+            'X-RateLimit-Reset': str(reset),
+            'X-RateLimit-Resource': resource,
+        }, allowed
+
+class ServerStats:
+    """
+    Requests answered and response body bytes sent by a server
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.response_bytes = 0
+
+    def add(self, response_bytes: int):
+        with self._lock:
+            self.requests += 1
+            self.response_bytes += response_bytes
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'response_bytes': self.response_bytes}
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.response_bytes = 0
+
+class Recording:
+    """
+    Github responses keyed by request, loaded from and appended to a JSON lines file
+    Absolute urls in Link headers are stored relative to the server, so a
+    recording replays on any port
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses = {}
+        if os.path.exists(path):
+            with open(path) as recording:
+                for line in recording:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses[entry['key']] = entry
+
+    @staticmethod
+    def make_key(method: str, path: str, query: str, body: bytes = b'') -> str:
+        """
+        Identifies a request independently of its query parameter order; POST
+        bodies (GraphQL queries) are part of the key
+        """
+        key = f'{method} {path}'
+        params = sorted(parse_qsl(query, keep_blank_values=True))
+        if params:
+            key += '?' + urlencode(params)
+        if body:
+            key += ' ' + hashlib.sha1(body).hexdigest()
+        return key
+
+    def get(self, key: str):
+        return self._responses.get(key)
+
+    def put(self, key: str, status: int, headers: dict, body: bytes):
+        entry = {'key': key, 'status': status, 'headers': headers, 'body': body.decode()}
+        with self._lock:
+            self._responses[key] = entry
+            with open(self.path, 'a') as recording:
+                recording.write(json.dumps(entry) + '\n')
+
+    def __len__(self):
+        return len(self._responses)
+
+class MockGithubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    users = {}
+    latency = 0.0
+    # Each request is delayed by latency plus or minus up to jitter seconds
+    jitter = 0.0
+    delay_random = random.Random(0)
+    rate_limits = None
+    recording = None
+    # Requests missing from the recording are sent here and recorded
+    upstream = None
+    upstream_session = None
+    rate_headers = {}
+    stats = None
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body: bytes, status=200, headers=None):
+        if self.stats is not None:
+            self.stats.add(len(body))
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in {**self.rate_headers, **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status=200, headers=None):
+        self.send_body(json.dumps(data).encode(), status, {'Content-Type': 'application/json', **(headers or {})})
+
+    def send_page(self, items, path, query):
+        per_page = int(query.get('per_page', 30))
+        page = int(query.get('page', 1))
+        last_page = max(1, -(-len(items) // per_page))
+        headers = {}
+        if last_page > 1:
+            # Like Github, the links keep every other query parameter
+            def link(target, rel):
+                return f'<{self.base_url}{path}?{urlencode({**query, "page": target})}>; rel="{rel}"'
+            links = []
+            if page > 1:
+                links += [link(page - 1, 'prev'), link(1, 'first')]
+            if page < last_page:
+                links += [link(page + 1, 'next'), link(last_page, 'last')]
+            headers['Link'] = ', '.join(links)
+        self.send_json(items[(page - 1) * per_page:page * per_page], headers=headers)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def get_token(self):
+        authorization = self.headers.get('Authorization') or ''
+        scheme, _, token = authorization.partition(' ')
+        return token if scheme.lower() in ('token', 'bearer') and token else None
+
+    def handle_request(self, method: str):
+        """
+        Delays, rate limits, then answers from the recording, the upstream API or the synthetic users
+        """
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        delay = self.latency + (self.delay_random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        self.rate_headers = {}
+        if self.rate_limits is not None:
+            self.rate_headers, allowed = self.rate_limits.take(self.get_token(), rate_limit.get_resource(url.path))
+            if not allowed:
+                return self.send_json({'message': 'API rate limit exceeded'}, 403)
+
+        if self.recording is not None:
+            key = Recording.make_key(method, url.path, url.query, body)
+            entry = self.recording.get(key)
+            if entry is None and self.upstream:
+                entry = self.record(method, key, body)
+            if entry is not None:
+                headers = dict(entry['headers'])
+                if 'Link' in headers:
+                    headers['Link'] = headers['Link'].replace('<{base_url}', f'<{self.base_url}')
+                return self.send_body(entry['body'].encode(), entry['status'], headers)
+            if not self.users:
+                return self.send_json({'message': f'Not recorded: {key}'}, 404)
+
+        if method == 'GET':
+            return self.serve_get(url)
+        return self.serve_post(url, body)
+
+    def record(self, method: str, key: str, body: bytes):
+        """
+        Forwards a request to the upstream API and records the response
+        Conditional headers are dropped so that full responses are recorded
+        """
+        headers = {name: self.headers[name] for name in ('Authorization', 'Accept', 'Content-Type')
+                   if self.headers.get(name)}
+        response = self.upstream_session.request(method, f'{self.upstream}{self.path}', headers=headers,
+                                                 data=body or None)
+        # The real quota is what the client has to track while recording
+        self.rate_headers = {name: value for name, value in response.headers.items()
+                             if name.lower().startswith('x-ratelimit-') or name.lower() == 'retry-after'}
+        recorded = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+        if 'Link' in recorded:
+            recorded['Link'] = recorded['Link'].replace(f'<{self.upstream}', '<{base_url}')
+        if response.status_code in (403, 429):
+            # A rate limited answer is passed on but not recorded
+            return {'status': response.status_code, 'headers': recorded, 'body': response.text}
+        self.recording.put(key, response.status_code, recorded, response.content)
+        return self.recording.get(key)
+
+    def serve_get(self, url):
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        path = url.path
+
+        match = re.fullmatch(r'/users/([^/]+)(/repos)?', path)
+        if match:
+            user = self.users.get(match.group(1))
+            if user is None:
+                return self.send_json({'message': 'Not Found'}, 404)
+            if match.group(2):
+                repos = user.repos
+                if query.get('sort') == 'pushed':
+                    repos = sorted(repos, key=lambda repo: repo['pushed_at'], reverse=query.get('direction') != 'asc')
+                return self.send_page(repos, path, query)
+            return self.send_json(user.profile())
+
+        if path == '/search/issues':
+            return self.send_json(self.search_issues(query.get('q', '')))
+
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)/commits/([0-9a-f]+)', path)
+        if match:
+            user = self.users.get(match.group(1))
+            commit = user.commit(match.group(2), match.group(3)) if user and user.repo(match.group(2)) else None
+            if commit is None:
+                return self.send_json({'message': 'No commit found for SHA'}, 422)
+            return self.send_json(commit)
+
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)(/[a-z]+)?', path)
+        user = self.users.get(match.group(1)) if match else None
+        if user is None or user.repo(match.group(2)) is None:
+            return self.send_json({'message': 'Not Found'}, 404)
+        repo, resource = match.group(2), match.group(3)
+        if resource is None:
+            return self.send_json(user.repo(repo))
+        if resource == '/commits':
+            commits = user.commits(repo)
+            # since and until filter on the committer date, inclusively
+            if 'since' in query:
+                commits = [commit for commit in commits if commit['commit']['committer']['date'] >= query['since']]
+            if 'until' in query:
+                commits = [commit for commit in commits if commit['commit']['committer']['date'] <= query['until']]
+            return self.send_page(commits, path, query)
+        if resource == '/languages':
+            return self.send_json(user.languages(repo))
+        if resource == '/issues':
+            items = user.issues(repo)
+            if 'since' in query:
+                items = [item for item in items if item['updated_at'] >= query['since']]
+            if query.get('sort') == 'updated':
+                items = sorted(items, key=lambda item: item['updated_at'], reverse=query.get('direction') != 'asc')
+            return self.send_page(items, path, query)
+        if resource == '/pulls':
+            return self.send_page(user.pulls(repo), path, query)
+        return self.send_json({'message': 'Not Found'}, 404)
+
+    def search_issues(self, q: str) -> dict:
+        """
+        Issue search supporting the user:, is:pr/is:issue and is:open/is:closed qualifiers
+        """
+        terms = [term.split(':', 1) for term in q.split() if ':' in term]
+        user = self.users.get(next((value for key, value in terms if key == 'user'), None))
+        states = [value for key, value in terms if key == 'is' and value in ('open', 'closed')]
+        kinds = [value for key, value in terms if key == 'is' and value in ('pr', 'issue')]
+        merged = ('is', 'merged') in [tuple(term) for term in terms]
+        items = []
+        for repo in user.repos if user else []:
+            for item in user.issues(repo['name']):
+                if kinds and ('pr' if 'pull_request' in item else 'issue') not in kinds:
+                    continue
+                if states and item['state'] not in states:
+                    continue
+                if merged and not (item.get('pull_request') or {}).get('merged_at'):
+                    continue
+                items.append(item)
+        return {'total_count': len(items), 'incomplete_results': False, 'items': items[:1]}
+
+    def serve_post(self, url, body: bytes):
+        if url.path != '/graphql':
+            return self.send_json({'message': 'Not Found'}, 404)
+        request = json.loads(body or b'{}')
+        variables = request.get('variables') or {}
+        if request.get('operationName') == 'UserRepositories':
+            return self.send_json({'data': self.graphql_user_repositories(variables)})
+        if request.get('operationName') == 'RepositoryHistory':
+            return self.send_json({'data': self.graphql_repository_history(variables)})
+        return self.send_json({'errors': [{'message': 'Unknown operation'}]})
+
+    def graphql_history(self, user, repo, first, after):
+        commits = user.commits(repo)
+        start = int(after or 0)
+        end = start + first
+        return {
+            'pageInfo': {'hasNextPage': end < len(commits), 'endCursor': str(end)},
+            'nodes': [{'oid': commit['sha'], 'message': commit['commit']['message'],
+                       'authoredDate': commit['commit']['author']['date']} for commit in commits[start:end]],
+        }
+
+    def graphql_user_repositories(self, variables):
+        user = self.users.get(variables['login'])
+        if user is None:
+            return {'user': None}
+        start = int(variables.get('after') or 0)
+        end = start + variables['first']
+        nodes = []
+        for repo in user.repos[start:end]:
+            node = {
+                'name': repo['name'],
+                'stargazerCount': repo['stargazers_count'],
+                'watchers': {'totalCount': repo['watchers_count']},
+                'forkCount': repo['forks_count'],
+                'primaryLanguage': {'name': repo['language']},
+                'pushedAt': repo['pushed_at'],
+            }
+            if variables.get('withLanguages'):
+                node['languages'] = {'edges': [{'size': size, 'node': {'name': name}}
+                                               for name, size in user.languages(repo['name']).items()]}
+            if variables.get('withCollaboration'):
+                issues = user.issues(repo['name'])
+                node['pullRequests'] = {'nodes': [{
+                    'state': 'OPEN' if item['state'] == 'open' else
+                             'MERGED' if item['pull_request']['merged_at'] else 'CLOSED',
+                    'additions': item['number'] * 10, 'deletions': item['number'], 'changedFiles': 1,
+                    'comments': {'totalCount': item['comments']},
+                } for item in issues if 'pull_request' in item]}
+                node['issues'] = {'nodes': [{'state': item['state'].upper(), 'comments': {'totalCount': item['comments']}}
+                                            for item in issues if 'pull_request' not in item]}
+            if variables.get('withHistory'):
+                node['defaultBranchRef'] = {'target': {
+                    'history': self.graphql_history(user, repo['name'], variables['history'], None)}}
+            nodes.append(node)
+        return {'user': {
+            'followers': {'totalCount': user.profile()['followers']},
+            'following': {'totalCount': user.profile()['following']},
+            'repositories': {
+                'pageInfo': {'hasNextPage': end < len(user.repos), 'endCursor': str(end)},
+                'nodes': nodes,
+            },
+        }}
+
+    def graphql_repository_history(self, variables):
+        user = self.users.get(variables['owner'])
+        data = {}
+        for name, value in variables.items():
+            if name.endswith('_name'):
+                alias = name[:-len('_name')]
+                history = self.graphql_history(user, value, 100, variables.get(f'{alias}_after'))
+                data[alias] = {'defaultBranchRef': {'target': {'history': history}}}
+        return data
+
+def start_server(users, latency: float = 0.0, port: int = 0, jitter: float = 0.0, rate_limits: dict = None,
+                 recording: str = None, upstream: str = None, seed: int = 0, rate_limited: bool = True):
+    """
+    Serves the given SyntheticUsers on a background thread
+    rate_limits overrides the (limit, window seconds) of rate_limit.DEFAULT_LIMITS per resource;
+    rate_limited=False sends no X-RateLimit headers at all
+    With recording, requests are answered from that JSON lines file first; with
+    upstream too, requests it lacks are sent to upstream and recorded
+    Returns the server and its base url
+    """
+    handler = type('Handler', (MockGithubHandler,), {
+        'users': {user.username: user for user in users},
+        'latency': latency,
+        'jitter': jitter,
+        'delay_random': random.Random(seed),
+        'rate_limits': RateLimitWindows(rate_limits) if rate_limited else None,
+        'recording': Recording(recording) if recording else None,
+        'upstream': upstream.rstrip('/') if upstream else None,
+        'upstream_session': requests.Session() if upstream else None,
+        'stats': ServerStats(),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+def get_server_stats(server) -> dict:
+    """
+    Returns the requests a server from start_server answered and the response bytes it sent
+    """
+    return server.RequestHandlerClass.stats.snapshot()
+
+def reset_server_stats(server):
+    server.RequestHandlerClass.stats.reset()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Github API")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--repos', type=int, nargs='*', default=GENERATED_REPO_COUNTS,
+                        help="repository count of each generated user, served as synthetic-{count}")
+    parser.add_argument('--commits', type=int, default=120, help="commits per generated repository")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0, help="milliseconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0, help="milliseconds the latency varies by, either way")
+    parser.add_argument('--core-limit', type=int, default=rate_limit.DEFAULT_LIMITS['core'][0],
+                        help="core requests per token and hour")
+    parser.add_argument('--record', help="JSON lines file recording the responses of --upstream")
+    parser.add_argument('--upstream', default='https://api.github.com', help="API recorded with --record")
+    parser.add_argument('--replay', help="JSON lines file of recorded responses to serve")
+    args = parser.parse_args()
+
+    users = [] if args.record or args.replay else generate_users(args.repos, args.commits, args.seed)
+    server, base_url = start_server(users, args.latency / 1000, args.port, args.jitter / 1000,
+                                    rate_limits={'core': (args.core_limit, 3600)},
+                                    recording=args.record or args.replay,
+                                    upstream=args.upstream if args.record else None, seed=args.seed,
+                                    rate_limited=not args.record)
+    if args.record:
+        print(f"Recording {args.upstream} into {args.record}")
+    elif args.replay:
+        print(f"Replaying {len(server.RequestHandlerClass.recording)} responses from {args.replay}")
+    else:
+        print(f"Serving {', '.join(user.username for user in users)}")
+    print(f"Run the server with GITHUB_API_URL={base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Vectorized version of scoring.calculate_grade for rescoring whole cohorts of
+collected profiles at once, e.g. after changing weights
+
+Inputs are columns (one value per user) of the fields calculate_grade reads.
+Every clamp, weight and threshold is applied in the same order as the scalar
+function so the float64 results are identical, and outputs are rounded
+exactly like Python's round()
+"""
+from typing import Dict, Iterable, Mapping
+import numpy as np
+from scoring import WEIGHTS, GRADE_THRESHOLDS
+
+ACTIVITY_FIELDS = ('total_commits', 'consistency_score', 'recent_activity_score', 'active_days')
+POPULARITY_FIELDS = ('stars', 'avg_stars', 'followers', 'avg_watchers')
+# language_count stands in for len(primary_languages)
+CODE_QUALITY_FIELDS = ('commit_message_quality_score', 'language_count',
+                       'avg_additions_per_commit', 'avg_deletions_per_commit')
+COLLABORATION_FIELDS = ('total_prs', 'pr_merge_rate', 'total_issues', 'issue_close_rate')
+
+# Ascending thresholds for searchsorted: index i means at least THRESHOLDS[i - 1]
+THRESHOLDS = np.array([threshold for threshold, _ in reversed(GRADE_THRESHOLDS)], dtype=np.float64)
+GRADES = np.array(["F"] + [grade for _, grade in reversed(GRADE_THRESHOLDS)])
+
+def _columns(section: Mapping[str, Iterable], fields) -> Dict[str, np.ndarray]:
+    return {field: np.asarray(section[field], dtype=np.float64) for field in fields}
+
+def _round(values: np.ndarray) -> np.ndarray:
+    """
+    round(value, 2) for every value: numpy's rounding agrees with Python's
+    except next to a tie, so only those values go through round()
+    """
+    scaled = values * 100
+    rounded = np.round(scaled) / 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[ties] = [round(value, 2) for value in values[ties].tolist()]
+    return rounded
+
+def calculate_activity_scores(activity: Mapping[str, Iterable]) -> np.ndarray:
+    columns = _columns(activity, ACTIVITY_FIELDS)
+    commit_score = np.minimum(100, columns['total_commits'] / 10)
+    recent_activity_score = np.minimum(100, columns['recent_activity_score'] * 3.33)
+    active_days_score = np.minimum(100, columns['active_days'] * 1.11)
+    scores = (commit_score * 0.25 + columns['consistency_score'] * 0.35 +
+              recent_activity_score * 0.25 + active_days_score * 0.15)
+    return np.where(columns['total_commits'] > 0, scores, 0.0)
+
+def calculate_popularity_scores(popularity: Mapping[str, Iterable]) -> np.ndarray:
+    columns = _columns(popularity, POPULARITY_FIELDS)
+    star_score = np.minimum(100, columns['avg_stars'] * 5)
+    follower_score = np.minimum(100, columns['followers'] * 0.5)
+    watcher_score = np.minimum(100, columns['avg_watchers'] * 10)
+    scores = star_score * 0.5 + follower_score * 0.3 + watcher_score * 0.2
+    return np.where((columns['stars'] > 0) | (columns['followers'] > 0), scores, 0.0)
+
+def calculate_code_quality_scores(code_quality: Mapping[str, Iterable]) -> np.ndarray:
+    columns = _columns(code_quality, CODE_QUALITY_FIELDS)
+    language_diversity = np.minimum(100, columns['language_count'] * 15)
+    avg_changes = columns['avg_additions_per_commit'] + columns['avg_deletions_per_commit']
+    change_size_score = np.select(
+        [(avg_changes >= 10) & (avg_changes <= 200), (avg_changes >= 5) & (avg_changes <= 500), avg_changes > 0],
+        [100.0, 75.0, 50.0], default=0.0)
+    scores = (columns['commit_message_quality_score'] * 0.5 + language_diversity * 0.3 + change_size_score * 0.2)
+    return np.where(columns['commit_message_quality_score'] > 0, scores, 0.0)
+
+def calculate_collaboration_scores(collaboration: Mapping[str, Iterable]) -> np.ndarray:
+    columns = _columns(collaboration, COLLABORATION_FIELDS)
+    pr_activity_score = np.minimum(100, columns['total_prs'] * 5)
+    issue_activity_score = np.minimum(100, columns['total_issues'] * 5)
+    scores = (columns['pr_merge_rate'] * 100 * 0.3 + columns['issue_close_rate'] * 100 * 0.3 +
+              pr_activity_score * 0.2 + issue_activity_score * 0.2)
+    return np.where((columns['total_prs'] > 0) | (columns['total_issues'] > 0), scores, 0.0)
+
+def calculate_grades(activity: Mapping[str, Iterable], popularity: Mapping[str, Iterable],
+                     code_quality: Mapping[str, Iterable], collaboration: Mapping[str, Iterable]) -> dict:
+    """
+    Scores a cohort given one mapping of field name -> column per section
+    Returns calculate_grade's dict with an array in place of every value
+    """
+    activity_scores = calculate_activity_scores(activity)
+    popularity_scores = calculate_popularity_scores(popularity)
+    code_quality_scores = calculate_code_quality_scores(code_quality)
+    collaboration_scores = calculate_collaboration_scores(collaboration)
+
+    total_scores = (activity_scores * WEIGHTS['activity'] +
+                    popularity_scores * WEIGHTS['popularity'] +
+                    code_quality_scores * WEIGHTS['code_quality'] +
+                    collaboration_scores * WEIGHTS['collaboration'])
+
+    return {
+        'total_score': _round(total_scores),
+        'grade': GRADES[np.searchsorted(THRESHOLDS, total_scores, side='right')],
+        'breakdown': {
+            'activity': _round(activity_scores),
+            'popularity': _round(popularity_scores),
+            'code_quality': _round(code_quality_scores),
+            'collaboration': _round(collaboration_scores)
+        }
+    }
+
+def get_columns(replies: Iterable) -> dict:
+    """
+    Turns ProfileReply messages (or anything with the same attributes) into the
+    keyword arguments of calculate_grades
+    """
+    sections = {'activity': {field: [] for field in ACTIVITY_FIELDS},
+                'popularity': {field: [] for field in POPULARITY_FIELDS},
+                'code_quality': {field: [] for field in CODE_QUALITY_FIELDS},
+                'collaboration': {field: [] for field in COLLABORATION_FIELDS}}
+    for reply in replies:
+        for section, columns in sections.items():
+            message = getattr(reply, section)
+            for field, column in columns.items():
+                if field == 'language_count':
+                    column.append(len(message.primary_languages))
+                else:
+                    column.append(getattr(message, field))
+    return sections
@@ -1,26 +1,307 @@
+import asyncio
 import os
+import queue
+import threading
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-from github_api import profile_data, popularity_data, activity_data, code_quality_data, collaboration_data
+from github_api import rest_backend, graphql_backend
+from github_api.complete_profile_data import SECTIONS
+import result_cache
+import scoring
+from scoring import calculate_grade
 from protos import GithubGrader_pb2_grpc, GithubGrader_pb2
 import grpc
 
 load_dotenv()
+GITHUB_BACKEND = os.getenv("GITHUB_BACKEND", "rest")
+# Users graded at once across all GradeUsers streams, and per stream
+BATCH_WORKERS = int(os.getenv("GRADER_BATCH_WORKERS", 16))
+BATCH_CONCURRENCY = int(os.getenv("GRADER_BATCH_CONCURRENCY", 8))
+# Concurrent identical requests share one computation
+COALESCE_REQUESTS = os.getenv("GRADER_COALESCE", "1") == "1"
+# Threads refreshing stale cached results in the background
+REFRESH_WORKERS = int(os.getenv("GRADER_REFRESH_WORKERS", 4))
+
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="grade-users")
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="refresh")
+# Background refresh tasks of the grpc.aio servicers, kept so they are not garbage collected
+_refresh_tasks = set()
+
+BACKENDS = {
+    "rest": rest_backend,
+    "graphql": graphql_backend,
+}
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time: a caller arriving while
+    one is in progress waits for it and gets the same result or exception
+    Thread and asyncio callers share the same in-flight computations, and the
+    number of original and coalesced calls is counted per service (key[0])
+    """
+    def __init__(self, enabled: bool = COALESCE_REQUESTS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def _join(self, key):
+        """
+        Returns (future, leader) for key, leader being True when the caller has to compute it
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            service_stats = self._stats.setdefault(key[0], {'original': 0, 'coalesced': 0})
+            service_stats['original' if leader else 'coalesced'] += 1
+            return future, leader
+
+    def _finish(self, key, future: Future, result=None, exception: BaseException = None):
+        with self._lock:
+            del self._calls[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def do(self, key, func):
+        """
+        Returns func(), or the result of the call to it already in progress for key
+        """
+        if not self.enabled:
+            return func()
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            self._finish(key, future, exception=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, func):
+        """
+        Coroutine version of do for a func returning a coroutine; the
+        computation runs as its own task, so a caller that is cancelled does
+        not cancel it for the others
+        """
+        if not self.enabled:
+            return await func()
+        future, leader = self._join(key)
+        if leader:
+            def finish(task):
+                if task.cancelled():
+                    self._finish(key, future, exception=asyncio.CancelledError())
+                elif task.exception() is not None:
+                    self._finish(key, future, exception=task.exception())
+                else:
+                    self._finish(key, future, task.result())
+            asyncio.ensure_future(func()).add_done_callback(finish)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def get_stats(self) -> dict:
+        """
+        Returns per service the number of original calls, which did the work,
+        and of coalesced calls, which waited for one of them
+        """
+        with self._lock:
+            return {service: dict(service_stats) for service, service_stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+single_flight = SingleFlight()
+
+def get_coalescing_stats() -> dict:
+    return single_flight.get_stats()
+
+def collect_family_data(family, user, fetch):
+    """
+    Collects one metric family with fetch(user), sharing the collection with
+    concurrent callers, and caches the result
+    """
+    def collect():
+        data = fetch(user)
+        result_cache.cache.put(family, user, data)
+        return data
+    return single_flight.do((family, user), collect)
+
+def get_family_data(family, user, fetch, force_refresh=False):
+    """
+    Returns a metric family from the result cache when it is fresh; a stale
+    result is returned at once and refreshed in the background, and a missing
+    one (or any, with force_refresh) is collected before returning
+    """
+    if not force_refresh:
+        data, state = result_cache.cache.get(family, user)
+        if state == result_cache.FRESH:
+            return data
+        if state == result_cache.STALE:
+            if result_cache.cache.start_refresh(family, user):
+                _refresh_executor.submit(refresh_family_data, family, user, fetch)
+            return data
+    return collect_family_data(family, user, fetch)
+
+def refresh_family_data(family, user, fetch):
+    try:
+        collect_family_data(family, user, fetch)
+    except Exception as e:
+        print(f"Error refreshing {family} data for {user}: {e}")
+    finally:
+        result_cache.cache.end_refresh(family, user)
+
+async def collect_family_data_async(family, user, fetch):
+    """
+    Coroutine version of collect_family_data for a fetch returning a coroutine
+    """
+    async def collect():
+        data = await fetch(user)
+        result_cache.cache.put(family, user, data)
+        return data
+    return await single_flight.do_async((family, user), collect)
+
+async def get_family_data_async(family, user, fetch, force_refresh=False):
+    """
+    Coroutine version of get_family_data; stale results are refreshed in a task
+    """
+    if not force_refresh:
+        data, state = result_cache.cache.get(family, user)
+        if state == result_cache.FRESH:
+            return data
+        if state == result_cache.STALE:
+            if result_cache.cache.start_refresh(family, user):
+                task = asyncio.ensure_future(refresh_family_data_async(family, user, fetch))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            return data
+    return await collect_family_data_async(family, user, fetch)
+
+async def refresh_family_data_async(family, user, fetch):
+    try:
+        await collect_family_data_async(family, user, fetch)
+    except Exception as e:
+        print(f"Error refreshing {family} data for {user}: {e}")
+    finally:
+        result_cache.cache.end_refresh(family, user)
+
+def get_backend(name: str = GITHUB_BACKEND):
+    """
+    Returns the module whose get_*_data functions collect the metrics
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Github backend: {name}")
+    return BACKENDS[name]
+
+def build_popularity_reply(pop_data):
+    return GithubGrader_pb2.PopularityReply(
+        stars=pop_data["stars"],
+        avg_stars=pop_data["avg_stars"],
+        watchers=pop_data["watchers"],
+        avg_watchers=pop_data["avg_watchers"],
+        followers=pop_data["followers"],
+        following=pop_data["following"]
+    )
+
+def build_activity_reply(act_data):
+    return GithubGrader_pb2.ActivityReply(
+        total_commits=act_data["total_commits"],
+        avg_commits_per_repo=act_data["avg_commits_per_repo"],
+        recent_activity_score=act_data["recent_activity_score"],
+        consistency_score=act_data["consistency_score"],
+        active_days=act_data["active_days"]
+    )
+
+def build_code_quality_reply(code_qual):
+    return GithubGrader_pb2.CodeQualityReply(
+        primary_languages=code_qual["primary_languages"],
+        commit_message_quality_score=code_qual["commit_message_quality_score"],
+        avg_additions_per_commit=code_qual["avg_additions_per_commit"],
+        avg_deletions_per_commit=code_qual["avg_deletions_per_commit"]
+    )
+
+def build_collaboration_reply(collab_data):
+    return GithubGrader_pb2.CollaborationReply(
+        total_prs=collab_data["total_prs"],
+        merged_prs=collab_data["merged_prs"],
+        pr_merge_rate=collab_data["pr_merge_rate"],
+        total_issues=collab_data["total_issues"],
+        closed_issues=collab_data["closed_issues"],
+        issue_close_rate=collab_data["issue_close_rate"],
+        avg_pr_size=collab_data["avg_pr_size"]
+    )
+
+def build_profile_reply(profile):
+    reply = GithubGrader_pb2.ProfileReply(
+        username=profile["username"],
+        repositories=profile["repositories"]
+    )
+    if "popularity" in profile:
+        reply.popularity.CopyFrom(build_popularity_reply(profile["popularity"]))
+    if "activity" in profile:
+        reply.activity.CopyFrom(build_activity_reply(profile["activity"]))
+    if "code_quality" in profile:
+        reply.code_quality.CopyFrom(build_code_quality_reply(profile["code_quality"]))
+    if "collaboration" in profile:
+        reply.collaboration.CopyFrom(build_collaboration_reply(profile["collaboration"]))
+    return reply
+
+def build_graded_reply(profile):
+    """
+    Builds the ProfileReply for a profile with every section and fills in its score
+    """
+    reply = build_profile_reply(profile)
+    result = calculate_grade(reply.activity, reply.popularity, reply.code_quality, reply.collaboration)
+    reply.overall_score = result["total_score"]
+    reply.grade = result["grade"]
+    reply.breakdown.CopyFrom(GithubGrader_pb2.ScoreBreakdown(**result["breakdown"]))
+    return reply
+
+def warm_user(backend, user):
+    """
+    Collects every section of user ahead of a request for it, refreshing the
+    memoized report and the cached result of each metric family
+    Returns the graded ProfileReply
+    """
+    def collect():
+        profile = backend.get_complete_profile_data(user, SECTIONS)
+        for family in SECTIONS:
+            result_cache.cache.put(family, user, profile[family])
+        return scoring.report_cache.get_or_score(user, profile, lambda: build_graded_reply(profile))
+    # Shares the collection with a concurrent forced refresh of the same profile
+    return single_flight.do(("profile", user, SECTIONS, True), collect)
+
+def get_requested_sections(request):
+    """
+    Returns the sections selected by the include_* flags of a ProfileRequest,
+    or every section when no flag is set
+    """
+    flags = {
+        "popularity": request.include_popularity,
+        "activity": request.include_activity,
+        "code_quality": request.include_code_quality,
+        "collaboration": request.include_collaboration,
+    }
+    sections = [section for section, included in flags.items() if included]
+    return sections or list(flags)
 
 class PopularityProvider(GithubGrader_pb2_grpc.PopularityServiceServicer):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+
     def GetPopularityData(self, request, context):
         try:
             user = request.username
-            pop_data = popularity_data.get_popularity_data(user)
+            pop_data = get_family_data("popularity", user, self.backend.get_popularity_data,
+                                       request.force_refresh)
             
-            return GithubGrader_pb2.PopularityReply(
-                stars=pop_data["stars"],
-                avg_stars=pop_data["avg_stars"],
-                watchers=pop_data["watchers"],
-                avg_watchers=pop_data["avg_watchers"],
-                followers=pop_data["followers"],
-                following=pop_data["following"]
-            )
+            return build_popularity_reply(pop_data)
         except Exception as e:
             print(f"Error in GetPopularityData: {e}")
             traceback.print_exc()
@@ -29,18 +310,16 @@ class PopularityProvider(GithubGrader_pb2_grpc.PopularityServiceServicer):
             raise
 
 class ActivityProvider(GithubGrader_pb2_grpc.ActivityServiceServicer):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+
     def GetActivityData(self, request, context):
         try:
             user = request.username
-            act_data = activity_data.get_activity_data(user)
+            act_data = get_family_data("activity", user, self.backend.get_activity_data,
+                                       request.force_refresh)
             
-            return GithubGrader_pb2.ActivityReply(
-                total_commits=act_data["total_commits"],
-                avg_commits_per_repo=act_data["avg_commits_per_repo"],
-                recent_activity_score=act_data["recent_activity_score"],
-                consistency_score=act_data["consistency_score"],
-                active_days=act_data["active_days"]
-            )
+            return build_activity_reply(act_data)
         except Exception as e:
             print(f"Error in GetActivityData: {e}")
             traceback.print_exc()
@@ -49,17 +328,16 @@ class ActivityProvider(GithubGrader_pb2_grpc.ActivityServiceServicer):
             raise
 
 class CodeQualityProvider(GithubGrader_pb2_grpc.CodeQualityServiceServicer):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+
     def GetCodeQualityData(self, request, context):
         try:
             user = request.username
-            code_qual = code_quality_data.get_code_quality_data(user)
+            code_qual = get_family_data("code_quality", user, self.backend.get_code_quality_data,
+                                        request.force_refresh)
             
-            return GithubGrader_pb2.CodeQualityReply(
-                primary_languages=code_qual["primary_languages"],
-                commit_message_quality_score=code_qual["commit_message_quality_score"],
-                avg_additions_per_commit=code_qual["avg_additions_per_commit"],
-                avg_deletions_per_commit=code_qual["avg_deletions_per_commit"]
-            )
+            return build_code_quality_reply(code_qual)
         except Exception as e:
             print(f"Error in GetCodeQualityData: {e}")
             traceback.print_exc()
@@ -68,23 +346,227 @@ class CodeQualityProvider(GithubGrader_pb2_grpc.CodeQualityServiceServicer):
             raise
 
 class CollaborationProvider(GithubGrader_pb2_grpc.CollaborationServiceServicer):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+
     def GetCollaborationData(self, request, context):
         try:
             user = request.username
-            collab_data = collaboration_data.get_collaboration_data(user)
+            collab_data = get_family_data("collaboration", user, self.backend.get_collaboration_data,
+                                          request.force_refresh)
             
-            return GithubGrader_pb2.CollaborationReply(
-                total_prs=collab_data["total_prs"],
-                merged_prs=collab_data["merged_prs"],
-                pr_merge_rate=collab_data["pr_merge_rate"],
-                total_issues=collab_data["total_issues"],
-                closed_issues=collab_data["closed_issues"],
-                issue_close_rate=collab_data["issue_close_rate"],
-                avg_pr_size=collab_data["avg_pr_size"]
-            )
+            return build_collaboration_reply(collab_data)
         except Exception as e:
             print(f"Error in GetCollaborationData: {e}")
             traceback.print_exc()
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Error: {str(e)}")
             raise
+
+class ProfileProvider(GithubGrader_pb2_grpc.ProfileServiceServicer):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+
+    def get_profile_reply(self, request):
+        """
+        Collects the requested sections; a request for every section is graded
+        and memoized, so a repeat lookup is answered without calling Github
+        Concurrent requests for the same user and sections share one collection;
+        force_refresh skips the memoized report
+        """
+        sections = get_requested_sections(request)
+        return single_flight.do(("profile", request.username, tuple(sections), request.force_refresh),
+                                lambda: self.collect_profile_reply(request.username, sections, request.force_refresh))
+
+    def collect_profile_reply(self, user, sections, force_refresh=False):
+        """
+        Builds the reply for user's sections from the report cache or a fresh collection
+        """
+        if len(sections) < len(SECTIONS):
+            return build_profile_reply(self.backend.get_complete_profile_data(user, sections))
+
+        reply = None if force_refresh else scoring.report_cache.get(user)
+        if reply is None:
+            profile = self.backend.get_complete_profile_data(user, sections)
+            reply = scoring.report_cache.get_or_score(user, profile, lambda: build_graded_reply(profile))
+        return reply
+
+    def GetCompleteProfile(self, request, context):
+        try:
+            return self.get_profile_reply(request)
+        except Exception as e:
+            print(f"Error in GetCompleteProfile: {e}")
+            traceback.print_exc()
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Error: {str(e)}")
+            raise
+
+    def GradeUsers(self, request_iterator, context):
+        """
+        Grades every user streamed in and streams each report back as soon as
+        it is ready, so replies arrive out of order
+        A user that fails gets a reply with only username and error set
+        """
+        replies = queue.Queue()
+        # Bounds the users in flight for this stream; reading stops until a slot frees
+        slots = threading.BoundedSemaphore(BATCH_CONCURRENCY)
+
+        def grade(request):
+            try:
+                replies.put(self.get_profile_reply(request))
+            except Exception as e:
+                print(f"Error in GradeUsers for {request.username}: {e}")
+                replies.put(GithubGrader_pb2.ProfileReply(username=request.username, error=str(e)))
+            finally:
+                slots.release()
+
+        def submit_requests():
+            submitted = 0
+            try:
+                for request in request_iterator:
+                    slots.acquire()
+                    if not context.is_active():
+                        slots.release()
+                        break
+                    _batch_executor.submit(grade, request)
+                    submitted += 1
+            except Exception as e:
+                print(f"Error reading GradeUsers requests: {e}")
+            replies.put(submitted)
+
+        threading.Thread(target=submit_requests, daemon=True).start()
+        sent, total = 0, None
+        while total is None or sent < total:
+            reply = replies.get()
+            if isinstance(reply, int):
+                total = reply
+                continue
+            sent += 1
+            yield reply
+
+# grpc.aio servicers: each RPC is a coroutine on the server's event loop and
+# only holds an I/O thread while one of its Github requests is in flight
+
+class AsyncPopularityProvider(PopularityProvider):
+    async def GetPopularityData(self, request, context):
+        try:
+            user = request.username
+            pop_data = await get_family_data_async("popularity", user, self.backend.get_popularity_data_async,
+                                                   request.force_refresh)
+            return build_popularity_reply(pop_data)
+        except Exception as e:
+            print(f"Error in GetPopularityData: {e}")
+            traceback.print_exc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Error: {str(e)}")
+
+class AsyncActivityProvider(ActivityProvider):
+    async def GetActivityData(self, request, context):
+        try:
+            user = request.username
+            act_data = await get_family_data_async("activity", user, self.backend.get_activity_data_async,
+                                                   request.force_refresh)
+            return build_activity_reply(act_data)
+        except Exception as e:
+            print(f"Error in GetActivityData: {e}")
+            traceback.print_exc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Error: {str(e)}")
+
+class AsyncCodeQualityProvider(CodeQualityProvider):
+    async def GetCodeQualityData(self, request, context):
+        try:
+            user = request.username
+            code_qual = await get_family_data_async("code_quality", user, self.backend.get_code_quality_data_async,
+                                                    request.force_refresh)
+            return build_code_quality_reply(code_qual)
+        except Exception as e:
+            print(f"Error in GetCodeQualityData: {e}")
+            traceback.print_exc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Error: {str(e)}")
+
+class AsyncCollaborationProvider(CollaborationProvider):
+    async def GetCollaborationData(self, request, context):
+        try:
+            user = request.username
+            collab_data = await get_family_data_async("collaboration", user, self.backend.get_collaboration_data_async,
+                                                      request.force_refresh)
+            return build_collaboration_reply(collab_data)
+        except Exception as e:
+            print(f"Error in GetCollaborationData: {e}")
+            traceback.print_exc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Error: {str(e)}")
+
+class AsyncProfileProvider(ProfileProvider):
+    async def get_profile_reply_async(self, request):
+        """
+        Coroutine version of ProfileProvider.get_profile_reply
+        """
+        sections = get_requested_sections(request)
+        return await single_flight.do_async(
+            ("profile", request.username, tuple(sections), request.force_refresh),
+            lambda: self.collect_profile_reply_async(request.username, sections, request.force_refresh))
+
+    async def collect_profile_reply_async(self, user, sections, force_refresh=False):
+        if len(sections) < len(SECTIONS):
+            return build_profile_reply(await self.backend.get_complete_profile_data_async(user, sections))
+
+        reply = None if force_refresh else scoring.report_cache.get(user)
+        if reply is None:
+            profile = await self.backend.get_complete_profile_data_async(user, sections)
+            reply = scoring.report_cache.get_or_score(user, profile, lambda: build_graded_reply(profile))
+        return reply
+
+    async def GetCompleteProfile(self, request, context):
+        try:
+            return await self.get_profile_reply_async(request)
+        except Exception as e:
+            print(f"Error in GetCompleteProfile: {e}")
+            traceback.print_exc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Error: {str(e)}")
+
+    async def GradeUsers(self, request_iterator, context):
+        """
+        Coroutine version of ProfileProvider.GradeUsers; every user in the
+        stream is graded as a task on the server's event loop
+        """
+        replies = asyncio.Queue()
+        slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+        tasks = set()
+
+        async def grade(request):
+            try:
+                reply = await self.get_profile_reply_async(request)
+            except Exception as e:
+                print(f"Error in GradeUsers for {request.username}: {e}")
+                reply = GithubGrader_pb2.ProfileReply(username=request.username, error=str(e))
+            finally:
+                slots.release()
+            await replies.put(reply)
+
+        async def submit_requests():
+            submitted = 0
+            try:
+                async for request in request_iterator:
+                    await slots.acquire()
+                    task = asyncio.create_task(grade(request))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    submitted += 1
+            except Exception as e:
+                print(f"Error reading GradeUsers requests: {e}")
+            await replies.put(submitted)
+
+        reader = asyncio.create_task(submit_requests())
+        try:
+            sent, total = 0, None
+            while total is None or sent < total:
+                reply = await replies.get()
+                if isinstance(reply, int):
+                    total = reply
+                    continue
+                sent += 1
+                yield reply
+        finally:
+            # The client went away: stop grading users nobody will read
+            reader.cancel()
+            for task in list(tasks):
+                task.cancel()
@@ -1,64 +1,53 @@
-import requests
 import os
-from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from typing import List
-from github_api.profile_data import get_all_repos
-load_dotenv()
-github_key = os.getenv("GITHUB_KEY")
-headers = {'Authorization': f'token {github_key}'}
-base_url = 'https://api.github.com'
+from typing import List, Dict
+from github_api.profile_data import get_all_repos, Repository
+from github_api import commit_cache, commit_store, async_client
+from github_api.commit_timeline import CommitTimeline
+
+COMMITS_PER_PAGE = 100
+# Pages of newest commits read per repository; 0 reads the full history
+COMMIT_PAGES = int(os.getenv("ACTIVITY_COMMIT_PAGES", 5))
 
 def get_repo_commits(owner, repo, per_page=100, max_pages=3):
     """
-    Gets recent commits from a Github repository
-    """
-    commits = []
-    page = 1
-    while page <= max_pages:
-        try:
-            response = requests.get(f'{base_url}/repos/{owner}/{repo}/commits', 
-                                  headers=headers, 
-                                  params={'per_page': per_page, 'page': page})
-            if response.status_code != 200:
-                print(f"Error fetching commits for {repo}: {response.status_code}")
-                break
-                
-            page_commits = response.json()
-            if not page_commits:
-                break
-            
-            for commit in page_commits:
-                commit_data = commit.get('commit', {})
-                stats = commit.get('stats', {})
-                
-                parsed_commit = {
-                    'message': commit_data.get('message', ''),
-                    'additions': stats.get('additions', 0),
-                    'deletions': stats.get('deletions', 0),
-                    'date': commit_data.get('author', {}).get('date', ''),
-                    'sha': commit.get('sha', '')
-                }
-                commits.append(parsed_commit)
-            page += 1
-        except Exception as e:
-            print(f"Error processing commits for {repo}: {str(e)}")
-            break
-    
-    return commits
+    Gets recent commits from a Github repository, or its full history when max_pages is 0
+    Served from the persistent commit store, which only asks Github for commits
+    newer than the ones it holds, or from the in-memory commit cache when the
+    store is disabled; either way every per_page/max_pages view of the same
+    repository reuses one download
+    """
+    limit = per_page * max_pages if max_pages else None
+    store = commit_store.get_store()
+    if store:
+        return store.get_commits(owner, repo, limit)
+    return commit_cache.get_commits(owner, repo, limit)
 
 def get_activity_data(user: str):
     """
     Analyzes user's commit activity patterns and returns activity metrics
     Returns a dictionary that can be used to create ActivityData
     """
-    repos = get_all_repos(user)
+    return async_client.run_sync(get_activity_data_async(user))
+
+async def get_activity_data_async(user: str):
+    """
+    Asynchronous version of get_activity_data that fetches the repositories concurrently
+    """
+    repos = await async_client.call(user, get_all_repos, user)
+    commits_by_repo = await async_client.map_repos(user, repos, get_repo_commits,
+                                                   per_page=COMMITS_PER_PAGE, max_pages=COMMIT_PAGES)
+    return build_activity_data(repos, commits_by_repo)
+
+def build_activity_data(repos: List[Repository], commits_by_repo: Dict[str, List[dict]]):
+    """
+    Computes activity metrics from commits that have already been fetched
+    """
     try:
         all_commits = []
         total_commits = 0
         
         for repo in repos:
-            repo_commits = get_repo_commits(user, repo, per_page=100, max_pages=5)
+            repo_commits = commits_by_repo.get(repo.name, [])
             all_commits.extend(repo_commits)
             total_commits += len(repo_commits)
         
@@ -72,9 +61,11 @@ def get_activity_data(user: str):
             }
         
         avg_commits_per_repo = round(total_commits / len(repos), 2)
-        recent_activity_score = calculate_recent_activity(all_commits)
-        consistency_score = calculate_consistency_score(all_commits)
-        active_days = calculate_active_days(all_commits, days=90)
+        # Dates are parsed once and shared by every metric
+        timeline = CommitTimeline.from_commits(all_commits)
+        recent_activity_score = timeline.count_recent(days=30)
+        consistency_score = timeline.consistency_score()
+        active_days = timeline.active_days(days=90)
         
         return {
             'total_commits': total_commits,
@@ -100,20 +91,7 @@ def calculate_recent_activity(commits: List[dict], days: int = 30) -> int:
     """
     if not commits:
         return 0
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    recent_commits = 0
-    
-    for commit in commits:
-        try:
-            if commit.get('date'):
-                commit_date = datetime.fromisoformat(commit['date'].replace('Z', '+00:00'))
-                if commit_date.replace(tzinfo=None) > cutoff_date:
-                    recent_commits += 1
-        except (ValueError, TypeError):
-            continue
-    
-    return recent_commits
+    return CommitTimeline.from_commits(commits).count_recent(days)
 
 def calculate_consistency_score(commits: List[dict]) -> float:
     """
@@ -122,41 +100,7 @@ def calculate_consistency_score(commits: List[dict]) -> float:
     """
     if len(commits) < 7:  
         return 0.0
-    
-    commit_dates = {}
-    for commit in commits:
-        try:
-            if commit.get('date'):
-                commit_date = datetime.fromisoformat(commit['date'].replace('Z', '+00:00'))
-                date_key = commit_date.date()
-                commit_dates[date_key] = commit_dates.get(date_key, 0) + 1
-        except (ValueError, TypeError):
-            continue
-    
-    if not commit_dates:
-        return 0.0
-    
-    dates = list(commit_dates.keys())
-    if len(dates) < 2:
-        return 0.0
-    
-    dates.sort()
-    date_range = (dates[-1] - dates[0]).days + 1
-    
-    active_days = len(dates)
-    activity_rate = active_days / max(date_range, 1)
-    
-    daily_commits = list(commit_dates.values())
-    if len(daily_commits) > 1:
-        mean_commits = sum(daily_commits) / len(daily_commits)
-        variance = sum((x - mean_commits) ** 2 for x in daily_commits) / len(daily_commits)
-        consistency_factor = 1 / (1 + variance) 
-    else:
-        consistency_factor = 1.0
-    
-    consistency_score = (activity_rate * 0.7 + consistency_factor * 0.3) * 100
-    
-    return round(min(100.0, consistency_score), 2)
+    return CommitTimeline.from_commits(commits).consistency_score()
 
 def calculate_active_days(commits: List[dict], days: int = 90) -> int:
     """
@@ -164,20 +108,7 @@ def calculate_active_days(commits: List[dict], days: int = 90) -> int:
     """
     if not commits:
         return 0
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    active_dates = set()
-    
-    for commit in commits:
-        try:
-            if commit.get('date'):
-                commit_date = datetime.fromisoformat(commit['date'].replace('Z', '+00:00'))
-                if commit_date.replace(tzinfo=None) > cutoff_date:
-                    active_dates.add(commit_date.date())
-        except (ValueError, TypeError):
-            continue
-    
-    return len(active_dates)
+    return CommitTimeline.from_commits(commits).active_days(days)
 
 def get_commit_frequency_stats(user: str, repos: List[str]) -> dict:
     """
@@ -196,25 +127,7 @@ def get_commit_frequency_stats(user: str, repos: List[str]) -> dict:
                 'total_analyzed': 0
             }
         
-        now = datetime.now()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        
-        commits_this_week = 0
-        commits_this_month = 0
-        
-        for commit in all_commits:
-            try:
-                if commit.get('date'):
-                    commit_date = datetime.fromisoformat(commit['date'].replace('Z', '+00:00'))
-                    commit_date = commit_date.replace(tzinfo=None)
-                    
-                    if commit_date > week_ago:
-                        commits_this_week += 1
-                    if commit_date > month_ago:
-                        commits_this_month += 1
-            except (ValueError, TypeError):
-                continue
+        commits_this_week, commits_this_month = CommitTimeline.from_commits(all_commits).count_windows([7, 30])
         
         return {
             'commits_per_week': commits_this_week,
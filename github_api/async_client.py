@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, AsyncIterator
+from github_api import http_client
+
+GLOBAL_CONCURRENCY = int(os.getenv("GITHUB_GLOBAL_CONCURRENCY", 32))
+USER_CONCURRENCY = int(os.getenv("GITHUB_USER_CONCURRENCY", 8))
+
+class Limiter:
+    """
+    Counting semaphore that can be awaited from any event loop or thread,
+    so one limit holds across every RPC running its own loop
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted and waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            # The slot is handed straight to the next waiter
+            waiter = self._waiters.popleft()
+        waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+
+    def _grant(self, waiter):
+        if waiter.cancelled():
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+_executor = ThreadPoolExecutor(max_workers=GLOBAL_CONCURRENCY, thread_name_prefix='github-io')
+global_limiter = Limiter(GLOBAL_CONCURRENCY)
+_user_limiters = weakref.WeakValueDictionary()
+_user_limiters_lock = threading.Lock()
+
+def configure(global_concurrency: int = GLOBAL_CONCURRENCY, user_concurrency: int = USER_CONCURRENCY):
+    """
+    Sets the global and per-user request concurrency limits
+    """
+    global _executor, global_limiter, USER_CONCURRENCY
+    old_executor = _executor
+    _executor = ThreadPoolExecutor(max_workers=global_concurrency, thread_name_prefix='github-io')
+    global_limiter = Limiter(global_concurrency)
+    USER_CONCURRENCY = user_concurrency
+    with _user_limiters_lock:
+        _user_limiters.clear()
+    old_executor.shutdown(wait=False)
+
+def get_user_limiter(user: str) -> Limiter:
+    with _user_limiters_lock:
+        limiter = _user_limiters.get(user)
+        if limiter is None:
+            limiter = Limiter(USER_CONCURRENCY)
+            _user_limiters[user] = limiter
+        return limiter
+
+async def call(user: str, func: Callable, *args, **kwargs):
+    """
+    Runs a blocking github_api helper on the shared I/O pool under the
+    per-user limit and the global limit
+    """
+    user_limiter = get_user_limiter(user)
+    async with user_limiter, global_limiter:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+async def get(user: str, path: str, params: dict = None):
+    """
+    Sends a GET request for a Github API path on behalf of a user
+    """
+    return await call(user, http_client.get, path, params)
+
+async def map_repos(user: str, repos: Iterable, func: Callable, *args, **kwargs) -> dict:
+    """
+    Calls func(user, repo.name, *args, **kwargs) for every repository concurrently
+    Returns the results keyed by repository name
+    """
+    names = [repo.name for repo in repos]
+    results = await asyncio.gather(*(call(user, func, user, name, *args, **kwargs) for name in names))
+    return dict(zip(names, results))
+
+async def iterate(iterator: Iterator) -> AsyncIterator:
+    """
+    Iterates a blocking iterator (e.g. a paginated listing) without blocking the event loop
+    """
+    loop = asyncio.get_running_loop()
+    sentinel = object()
+    while True:
+        item = await loop.run_in_executor(_executor, next, iterator, sentinel)
+        if item is sentinel:
+            return
+        yield item
+
+def run_sync(coroutine):
+    """
+    Runs a collector coroutine to completion for synchronous callers
+    """
+    return asyncio.run(coroutine)
@@ -1,21 +1,33 @@
-import requests
+import asyncio
+import functools
+import itertools
+import multiprocessing
 import os
 import re
-from dotenv import load_dotenv
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Dict
 from .activity_data import get_repo_commits
-from github_api.profile_data import get_all_repos
-load_dotenv()
-github_key = os.getenv("GITHUB_KEY")
-headers = {'Authorization': f'token {github_key}'}
-base_url = 'https://api.github.com'
+from github_api.profile_data import get_all_repos, Repository
+from github_api import http_client, async_client, commit_details
+
+COMMITS_PER_PAGE = 50
+COMMIT_PAGES = 3
+
+ACTION_VERBS = frozenset(['add', 'fix', 'update', 'remove', 'refactor', 'implement',
+                          'create', 'delete', 'modify', 'improve', 'optimize'])
+LAZY_PATTERNS = frozenset(['wip', 'test', 'asdf', 'update', 'fix', 'changes', 'stuff'])
+CONVENTIONAL_PATTERN = re.compile(r'^(feat|fix|docs|style|refactor|test|chore)(\(.+\))?: .+', re.IGNORECASE)
+MESSAGE_CACHE_SIZE = int(os.getenv("COMMIT_MESSAGE_CACHE_SIZE", 65536))
+# Worker processes for scoring large message batches; 1 scores in-process
+MESSAGE_PROCESSES = int(os.getenv("COMMIT_MESSAGE_PROCESSES", 1))
+MESSAGE_PROCESS_THRESHOLD = int(os.getenv("COMMIT_MESSAGE_PROCESS_THRESHOLD", 200000))
 
 def get_repo_languages(owner, repo):
     """
     Returns the language distribution in the repository
     """
     try:
-        response = requests.get(f'{base_url}/repos/{owner}/{repo}/languages', headers=headers)
+        response = http_client.get(f'/repos/{owner}/{repo}/languages')
         if response.status_code == 200:
             return response.json()
         else:
@@ -32,13 +44,31 @@ def analyze_commit_message_quality(messages):
     if not messages:
         return 0.0
     
-    total_score = 0
-    for message in messages:
-        score = score_single_commit_message(message)
-        total_score += score
+    total_score = sum(score_commit_messages(messages))
     
     return round(total_score / len(messages), 2)
 
+def score_commit_messages(messages: Iterable[str], processes: int = MESSAGE_PROCESSES) -> List[int]:
+    """
+    Scores a batch of commit messages, in order
+    Each distinct message is scored once; with processes > 1, batches of more
+    than MESSAGE_PROCESS_THRESHOLD distinct messages are scored in that many
+    worker processes
+    """
+    messages = list(messages)
+    distinct = list(dict.fromkeys(messages))
+    if processes > 1 and len(distinct) > MESSAGE_PROCESS_THRESHOLD:
+        chunk_size = -(-len(distinct) // (processes * 4))
+        chunks = [distinct[index:index + chunk_size] for index in range(0, len(distinct), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as executor:
+            scores = dict(zip(distinct, itertools.chain.from_iterable(executor.map(_score_chunk, chunks))))
+    else:
+        scores = {message: score_single_commit_message(message) for message in distinct}
+    return [scores[message] for message in messages]
+
+def _score_chunk(messages: List[str]) -> List[int]:
+    return [score_single_commit_message(message) for message in messages]
+
 def score_single_commit_message(message):
     """
     Scores a single commit message based on quality indicators
@@ -46,7 +76,14 @@ def score_single_commit_message(message):
     if not message or len(message.strip()) == 0:
         return 0
     
-    message = message.strip()
+    return _score_stripped_message(message.strip())
+
+@functools.lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def _score_stripped_message(message: str) -> int:
+    """
+    Scores a non-empty, stripped commit message; memoized because merge and
+    README messages repeat across most repositories
+    """
     score = 0
     
     if len(message) >= 50:
@@ -61,20 +98,17 @@ def score_single_commit_message(message):
     if message[0].isupper():
         score += 15
     
-    action_verbs = ['add', 'fix', 'update', 'remove', 'refactor', 'implement', 
-                   'create', 'delete', 'modify', 'improve', 'optimize']
-    first_word = message.split()[0].lower()
-    if first_word in action_verbs:
+    # Only the first word and whether there are at least three are needed
+    words = message.split(None, 3)
+    if words[0].lower() in ACTION_VERBS:
         score += 20
     
-    lazy_patterns = ['wip', 'test', 'asdf', 'update', 'fix', 'changes', 'stuff']
-    if message.lower() in lazy_patterns:
+    if message.lower() in LAZY_PATTERNS:
         score -= 10
-    elif len(message.split()) >= 3:
+    elif len(words) >= 3:
         score += 15
     
-    conventional_pattern = r'^(feat|fix|docs|style|refactor|test|chore)(\(.+\))?: .+'
-    if re.match(conventional_pattern, message, re.IGNORECASE):
+    if CONVENTIONAL_PATTERN.match(message):
         score += 20
     
     return max(0, min(100, score))
@@ -84,7 +118,37 @@ def get_code_quality_data(user: str):
     Analyzes code quality metrics across user's repositories
     Returns a dictionary that can be used to create CodeQualityData
     """
-    repos = get_all_repos(user)
+    return async_client.run_sync(get_code_quality_data_async(user))
+
+async def get_code_quality_data_async(user: str):
+    """
+    Asynchronous version of get_code_quality_data that fetches the repositories concurrently
+    """
+    repos = await async_client.call(user, get_all_repos, user)
+    languages_by_repo, commits_by_repo = await asyncio.gather(
+        async_client.map_repos(user, repos, get_repo_languages),
+        async_client.map_repos(user, repos, get_repo_commits,
+                               per_page=COMMITS_PER_PAGE, max_pages=COMMIT_PAGES)
+    )
+    commits_by_repo = await add_commit_stats_async(user, commits_by_repo)
+    return build_code_quality_data(repos, languages_by_repo, commits_by_repo)
+
+async def add_commit_stats_async(user: str, commits_by_repo: Dict[str, List[dict]]) -> Dict[str, List[dict]]:
+    """
+    Fills in the real additions and deletions of sampled commits when commit
+    details are enabled; the commit listing carries no stats of its own
+    """
+    if not commit_details.DETAILS_ENABLED:
+        return commits_by_repo
+    return await commit_details.add_commit_stats_async(
+        user, commits_by_repo, min(commit_details.DETAIL_SAMPLE_SIZE, COMMITS_PER_PAGE * COMMIT_PAGES))
+
+def build_code_quality_data(repos: List[Repository], languages_by_repo: Dict[str, dict],
+                            commits_by_repo: Dict[str, List[dict]]):
+    """
+    Computes code quality metrics from languages and commits that have already been fetched
+    Only the newest COMMITS_PER_PAGE * COMMIT_PAGES commits of each repo are considered
+    """
     try:
         all_languages = {}
         all_commit_messages = []
@@ -93,11 +157,11 @@ def get_code_quality_data(user: str):
         total_commits_with_stats = 0
         
         for repo in repos:
-            repo_languages = get_repo_languages(user, repo)
+            repo_languages = languages_by_repo.get(repo.name, {})
             for lang, bytes_count in repo_languages.items():
                 all_languages[lang] = all_languages.get(lang, 0) + bytes_count
             
-            repo_commits = get_repo_commits(user, repo, per_page=50, max_pages=3)
+            repo_commits = commits_by_repo.get(repo.name, [])[:COMMITS_PER_PAGE * COMMIT_PAGES]
             for commit in repo_commits:
                 if commit.get('message'):
                     all_commit_messages.append(commit['message'])
@@ -149,12 +213,11 @@ def get_repository_structure_score(user: str, repo: str) -> float:
         
         found_files = 0
         for file in important_files:
-            response = requests.get(f'{base_url}/repos/{user}/{repo}/contents/{file}', 
-                                  headers=headers)
+            response = http_client.get(f'/repos/{user}/{repo}/contents/{file}')
             if response.status_code == 200:
                 found_files += 1
         
-        response = requests.get(f'{base_url}/repos/{user}/{repo}/contents', headers=headers)
+        response = http_client.get(f'/repos/{user}/{repo}/contents')
         if response.status_code == 200:
             contents = response.json()
             directories = [item for item in contents if item.get('type') == 'dir']
@@ -1,79 +1,153 @@
-import requests
+import asyncio
 import os
-from dotenv import load_dotenv
-from typing import List
-from github_api.profile_data import get_all_repos
-load_dotenv()
-github_key = os.getenv("GITHUB_KEY")
-headers = {'Authorization': f'token {github_key}'}
-base_url = 'https://api.github.com'
+from typing import List, Dict, Optional
+from github_api.profile_data import get_all_repos, Repository
+from github_api import http_client, async_client, issue_cache, rate_limit
+
+# "search" takes PR and issue counts from four search API queries instead of
+# crawling every repository's issue listing, which is only crawled when a
+# search fails. Comments come from the listings alone, so without them the
+# community engagement score is None (unavailable) rather than 0
+COUNT_MODE = os.getenv("COLLABORATION_COUNT_MODE", "crawl")
+# Longest a count query waits for search quota before the listings' counts are used
+SEARCH_MAX_WAIT = float(os.getenv("GITHUB_SEARCH_MAX_WAIT", 10))
+
+# Counts over the repositories the user owns, like the per-repo crawl
+SEARCH_COUNT_QUERIES = {
+    'total_prs': 'user:{user} is:pr',
+    'merged_prs': 'user:{user} is:pr is:merged',
+    'total_issues': 'user:{user} is:issue',
+    'closed_issues': 'user:{user} is:issue is:closed',
+}
+
+def get_issue_items(owner, repo) -> Dict[str, List[dict]]:
+    """
+    Returns the issues and pull requests of a repo, split from one crawl of its
+    issue listing (which includes pull requests)
+    """
+    items = issue_cache.get_items(owner, repo)
+    return {
+        'prs': [{
+            'state': item['state'],
+            # The listing carries no sizes
+            'additions': 0,
+            'deletions': 0,
+            'changed_files': 0,
+            'merged': item['merged'],
+            'comments': item['comments']
+        } for item in items if item['pull_request']],
+        'issues': [{
+            'state': item['state'],
+            'comments': item['comments'],
+            'closed': item['state'] == 'closed'
+        } for item in items if not item['pull_request']]
+    }
 
 def get_pull_requests(owner, repo):
     """
     Returns relevant information on pull requests in a repo
     """
-    try:
-        response = requests.get(f'{base_url}/repos/{owner}/{repo}/pulls', 
-                              headers=headers, 
-                              params={'state': 'all', 'per_page': 100})
-        
-        if response.status_code != 200:
-            print(f"Error fetching PRs for {repo}: {response.status_code}")
-            return []
-            
-        prs = response.json()
-        parsed_prs = []
-        
-        for pr in prs:
-            parsed_prs.append({
-                'state': pr.get('state'),
-                'additions': pr.get('additions', 0),
-                'deletions': pr.get('deletions', 0),
-                'changed_files': pr.get('changed_files', 0),
-                'merged': pr.get('merged', False),
-                'comments': pr.get('comments', 0)
-            })
-        return parsed_prs
-        
-    except Exception as e:
-        print(f"Error processing PRs for {repo}: {str(e)}")
-        return []
+    return get_issue_items(owner, repo)['prs']
 
 def get_issues(owner, repo):
     """
     Returns the issues on user's public repositories
     """
+    return get_issue_items(owner, repo)['issues']
+
+def split_issue_items(items_by_repo: Dict[str, Dict[str, List[dict]]]):
+    """
+    Turns get_issue_items results keyed by repository into (prs_by_repo, issues_by_repo)
+    """
+    return ({name: items['prs'] for name, items in items_by_repo.items()},
+            {name: items['issues'] for name, items in items_by_repo.items()})
+
+def get_search_count(query: str) -> Optional[int]:
+    """
+    Returns the total_count of an issue search, or None when the search failed,
+    was incomplete or would have to wait longer than SEARCH_MAX_WAIT for quota
+    """
     try:
-        response = requests.get(f'{base_url}/repos/{owner}/{repo}/issues', 
-                              headers=headers, 
-                              params={'state': 'all', 'per_page': 100})
-        
+        response = http_client.get('/search/issues', params={'q': query, 'per_page': 1},
+                                   max_wait=SEARCH_MAX_WAIT)
         if response.status_code != 200:
-            print(f"Error fetching issues for {repo}: {response.status_code}")
-            return []
-            
-        issues = response.json()
-        parsed_issues = []
-        
-        for issue in issues:
-            if not issue.get('pull_request'):
-                parsed_issues.append({
-                    'state': issue.get('state'),
-                    'comments': issue.get('comments', 0),
-                    'closed': issue.get('state') == 'closed'
-                })
-        return parsed_issues
-        
+            print(f"Error searching {query}: {response.status_code}")
+            return None
+        result = response.json()
+        if result.get('incomplete_results'):
+            print(f"Incomplete search results for {query}")
+            return None
+        return result.get('total_count', 0)
+    except rate_limit.RateLimitError as e:
+        print(f"Skipping search {query}: {str(e)}")
+        return None
     except Exception as e:
-        print(f"Error processing issues for {repo}: {str(e)}")
-        return []
+        print(f"Error processing search {query}: {str(e)}")
+        return None
+
+def get_search_counts(user: str) -> Optional[dict]:
+    """
+    Returns total_prs, merged_prs, total_issues and closed_issues from the search
+    API, or None when any of the counts is unavailable
+    """
+    counts = {}
+    for field, query in SEARCH_COUNT_QUERIES.items():
+        counts[field] = get_search_count(query.format(user=user))
+        if counts[field] is None:
+            return None
+    return counts
+
+async def get_search_counts_async(user: str) -> Optional[dict]:
+    """
+    Asynchronous version of get_search_counts that sends the queries concurrently
+    """
+    results = await asyncio.gather(*(async_client.call(user, get_search_count, query.format(user=user))
+                                     for query in SEARCH_COUNT_QUERIES.values()))
+    if any(result is None for result in results):
+        return None
+    return dict(zip(SEARCH_COUNT_QUERIES, results))
 
 def get_collaboration_data(user: str):
     """
     Analyzes collaboration patterns across user's repositories
     Returns a dictionary that can be used to create CollaborationData
     """
-    repos = get_all_repos(user)
+    return async_client.run_sync(get_collaboration_data_async(user))
+
+async def get_collaboration_data_async(user: str):
+    """
+    Asynchronous version of get_collaboration_data that fetches the repositories concurrently
+    """
+    repos, counts = await asyncio.gather(
+        async_client.call(user, get_all_repos, user),
+        get_counts_async(user)
+    )
+    if counts is not None:
+        # The search counts stand in for the listings, which are not crawled
+        return build_collaboration_data(repos, None, None, counts)
+    items_by_repo = await async_client.map_repos(user, repos, get_issue_items)
+    prs_by_repo, issues_by_repo = split_issue_items(items_by_repo)
+    return build_collaboration_data(repos, prs_by_repo, issues_by_repo)
+
+async def get_counts_async(user: str) -> Optional[dict]:
+    """
+    Search API counts when COUNT_MODE is "search", otherwise None
+    """
+    if COUNT_MODE != 'search':
+        return None
+    return await get_search_counts_async(user)
+
+def build_collaboration_data(repos: List[Repository], prs_by_repo: Optional[Dict[str, List[dict]]],
+                             issues_by_repo: Optional[Dict[str, List[dict]]], counts: Optional[dict] = None):
+    """
+    Computes collaboration metrics from pull requests and issues that have already been fetched
+    counts, when given, replaces the PR and issue counts taken from the listings.
+    PR sizes and comments only come from the listings: when they were not
+    fetched (None), avg_pr_size is 0 and community_engagement_score is None
+    """
+    listed = prs_by_repo is not None and issues_by_repo is not None
+    prs_by_repo = prs_by_repo or {}
+    issues_by_repo = issues_by_repo or {}
     try:
         total_prs = 0
         merged_prs = 0
@@ -84,11 +158,11 @@ def get_collaboration_data(user: str):
         community_score = 0
         
         for repo in repos:
-            repo_prs = get_pull_requests(user, repo)
+            repo_prs = prs_by_repo.get(repo.name, [])
             total_prs += len(repo_prs)
             
             for pr in repo_prs:
-                if pr.get('merged') or pr.get('state') == 'closed':
+                if pr.get('merged'):
                     merged_prs += 1
                 
                 pr_size = pr.get('additions', 0) + pr.get('deletions', 0)
@@ -98,7 +172,7 @@ def get_collaboration_data(user: str):
                 
                 community_score += pr.get('comments', 0)
             
-            repo_issues = get_issues(user, repo)
+            repo_issues = issues_by_repo.get(repo.name, [])
             total_issues += len(repo_issues)
             
             for issue in repo_issues:
@@ -107,6 +181,12 @@ def get_collaboration_data(user: str):
                 
                 community_score += issue.get('comments', 0)
         
+        if counts:
+            total_prs = counts['total_prs']
+            merged_prs = counts['merged_prs']
+            total_issues = counts['total_issues']
+            closed_issues = counts['closed_issues']
+        
         pr_merge_rate = (
             round(merged_prs / total_prs, 3) if total_prs > 0 else 0.0
         )
@@ -119,9 +199,12 @@ def get_collaboration_data(user: str):
             round(pr_size_sum / pr_with_size_count, 2) if pr_with_size_count > 0 else 0.0
         )
         
-        community_engagement_score = (
-            round(community_score / len(repos), 1) if repos else 0
-        )
+        if not listed:
+            community_engagement_score = None
+        else:
+            community_engagement_score = (
+                round(community_score / len(repos), 1) if repos else 0
+            )
         
         return {
             'total_prs': total_prs,
@@ -189,7 +272,7 @@ def get_collaboration_quality_score(collaboration_dict: dict) -> float:
         elif total_activity > 0:
             score += 5
 
-        engagement = collaboration_dict.get('community_engagement_score', 0)
+        engagement = collaboration_dict.get('community_engagement_score') or 0
         if engagement >= 10:
             score += 20
         elif engagement >= 5:
@@ -276,9 +359,8 @@ def get_external_contributions(user: str) -> dict:
     This gives insight into open source collaboration
     """
     try:
-        response = requests.get(f'{base_url}/users/{user}/events', 
-                              headers=headers, 
-                              params={'per_page': 100})
+        response = http_client.get(f'/users/{user}/events', 
+                                 params={'per_page': 100})
         
         if response.status_code != 200:
             return {'external_contributions': 0, 'contributed_repos': []}
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from github_api import http_client
+
+# Commits are always fetched in pages of this size, whatever view a caller asks for
+CANONICAL_PER_PAGE = 100
+CACHE_TTL = float(os.getenv("COMMIT_CACHE_TTL", 300))
+CACHE_MAX_REPOS = int(os.getenv("COMMIT_CACHE_MAX_REPOS", 2048))
+
+class _RepoCommits:
+    __slots__ = ('lock', 'commits', 'complete', 'fetched_at')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commits = []
+        self.complete = False
+        self.fetched_at = time.monotonic()
+
+_entries = OrderedDict()
+_entries_lock = threading.Lock()
+
+def parse_commit(commit: dict) -> dict:
+    """
+    Keeps the fields of a commit listing entry that the metrics use
+    """
+    commit_data = commit.get('commit', {})
+    stats = commit.get('stats', {})
+    return {
+        'message': commit_data.get('message', ''),
+        'additions': stats.get('additions', 0),
+        'deletions': stats.get('deletions', 0),
+        'date': commit_data.get('author', {}).get('date', ''),
+        'sha': commit.get('sha', '')
+    }
+
+def fetch_commit_page(owner: str, repo: str, page: int) -> Optional[List[dict]]:
+    """
+    Fetches one canonical page of commits, newest first
+    Returns None when the page could not be fetched
+    """
+    try:
+        response = http_client.get(f'/repos/{owner}/{repo}/commits',
+                                   params={'per_page': CANONICAL_PER_PAGE, 'page': page})
+        if response.status_code != 200:
+            print(f"Error fetching commits for {repo}: {response.status_code}")
+            return None
+        return [parse_commit(commit) for commit in response.json()]
+    except Exception as e:
+        print(f"Error processing commits for {repo}: {str(e)}")
+        return None
+
+def _get_entry(owner: str, repo: str) -> _RepoCommits:
+    key = (owner, repo)
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is None or time.monotonic() - entry.fetched_at > CACHE_TTL:
+            entry = _RepoCommits()
+            _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > CACHE_MAX_REPOS:
+            _entries.popitem(last=False)
+        return entry
+
+def get_commits(owner: str, repo: str, limit: Optional[int]) -> List[dict]:
+    """
+    Returns up to `limit` of the newest commits of a repository, all of them when limit is None
+    Pages are downloaded once per (owner, repo) and shared by every view;
+    concurrent callers for the same repository wait for a single download
+    """
+    entry = _get_entry(owner, repo)
+    with entry.lock:
+        while (limit is None or len(entry.commits) < limit) and not entry.complete:
+            page = len(entry.commits) // CANONICAL_PER_PAGE + 1
+            page_commits = fetch_commit_page(owner, repo, page)
+            if page_commits is None:
+                break
+            entry.commits.extend(page_commits)
+            if len(page_commits) < CANONICAL_PER_PAGE:
+                entry.complete = True
+        return entry.commits[:limit]
+
+def clear():
+    with _entries_lock:
+        _entries.clear()
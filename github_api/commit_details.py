@@ -0,0 +1,156 @@
+"""
+Real additions and deletions of commits, which the commit listing leaves out
+
+The stats come from the single-commit endpoint, one request per commit, so
+this stage is opt-in and only the newest DETAIL_SAMPLE_SIZE commits of each
+repository are looked up. A commit's content never changes for its sha, so
+the stats are kept in a content-addressed store that never expires and each
+commit is requested at most once
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from github_api import http_client, async_client
+
+DETAILS_ENABLED = os.getenv("GITHUB_COMMIT_DETAILS", "0") == "1"
+DETAIL_STORE_PATH = os.getenv("GITHUB_COMMIT_DETAILS_PATH", ".github_commit_details.sqlite3")
+# Commits per repository whose stats are looked up, newest first
+DETAIL_SAMPLE_SIZE = int(os.getenv("GITHUB_COMMIT_DETAIL_SAMPLE", 20))
+# Single-commit requests in flight at once, across every user
+DETAIL_CONCURRENCY = int(os.getenv("GITHUB_COMMIT_DETAIL_CONCURRENCY", 8))
+# Stats kept in memory in front of the store, least recently used dropped first
+DETAIL_MEMORY_MAX = int(os.getenv("GITHUB_COMMIT_DETAIL_MEMORY_MAX", 50000))
+# Shas per lookup query, well below SQLite's bound variable limit
+LOOKUP_CHUNK_SIZE = 500
+
+class CommitStatsStore:
+    """
+    (additions, deletions) per commit sha, in a SQLite file fronted by a bounded
+    in-memory LRU of the most recently used shas
+    Stored entries are never evicted or refreshed: a sha always names the same change
+    """
+    def __init__(self, path: str = DETAIL_STORE_PATH, memory_max: int = DETAIL_MEMORY_MAX):
+        self.path = path
+        self.memory_max = memory_max
+        self._lock = threading.Lock()
+        self._stats = OrderedDict()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS commit_stats (
+                sha TEXT PRIMARY KEY,
+                additions INTEGER NOT NULL,
+                deletions INTEGER NOT NULL
+            )''')
+
+    def _remember(self, sha: str, stats: Tuple[int, int]):
+        self._stats[sha] = stats
+        self._stats.move_to_end(sha)
+        while len(self._stats) > self.memory_max:
+            self._stats.popitem(last=False)
+
+    def get_many(self, shas: List[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        Returns the stored stats of the given shas; unknown shas are left out,
+        as are the ones not yet looked up when the store fails
+        """
+        with self._lock:
+            found = {sha: self._stats[sha] for sha in shas if sha in self._stats}
+            for sha in found:
+                self._stats.move_to_end(sha)
+            missing = list(dict.fromkeys(sha for sha in shas if sha not in found))
+            for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                try:
+                    rows = self._db.execute(
+                        f'SELECT sha, additions, deletions FROM commit_stats WHERE sha IN ({placeholders})',
+                        chunk).fetchall()
+                except sqlite3.Error as e:
+                    # The rest are looked up on Github like any other missing stats
+                    print(f"Error reading commit stats: {str(e)}")
+                    break
+                for sha, additions, deletions in rows:
+                    found[sha] = (additions, deletions)
+                    self._remember(sha, found[sha])
+        return found
+
+    def put(self, sha: str, stats: Tuple[int, int]):
+        with self._lock:
+            self._remember(sha, stats)
+            try:
+                self._db.execute('INSERT OR IGNORE INTO commit_stats VALUES (?, ?, ?)', (sha, *stats))
+            except sqlite3.Error as e:
+                print(f"Error storing commit stats: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self._db.execute('DELETE FROM commit_stats')
+
+def fetch_commit_stats(owner: str, repo: str, sha: str) -> Optional[Tuple[int, int]]:
+    """
+    Fetches the additions and deletions of one commit
+    Returns None when the commit could not be fetched
+    """
+    try:
+        response = http_client.get(f'/repos/{owner}/{repo}/commits/{sha}')
+        if response.status_code != 200:
+            print(f"Error fetching commit {sha} for {repo}: {response.status_code}")
+            return None
+        stats = response.json().get('stats') or {}
+        return stats.get('additions', 0), stats.get('deletions', 0)
+    except Exception as e:
+        print(f"Error processing commit {sha} for {repo}: {str(e)}")
+        return None
+
+_store = None
+_store_lock = threading.Lock()
+_limiter = async_client.Limiter(DETAIL_CONCURRENCY)
+
+def get_store() -> CommitStatsStore:
+    """
+    Returns the shared commit stats store, opening it on first use
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CommitStatsStore()
+        return _store
+
+async def _fetch_and_store(user: str, repo: str, sha: str):
+    async with _limiter:
+        stats = await async_client.call(user, fetch_commit_stats, user, repo, sha)
+    if stats is not None:
+        get_store().put(sha, stats)
+    return stats
+
+async def add_commit_stats_async(user: str, commits_by_repo: Dict[str, List[dict]],
+                                 sample_size: int = DETAIL_SAMPLE_SIZE) -> Dict[str, List[dict]]:
+    """
+    Returns commits_by_repo with real additions and deletions on the newest
+    sample_size commits of every repository; commits past the sample, and ones
+    whose details could not be fetched, are returned unchanged
+    The given commit dictionaries are shared with the commit caches and are copied, not modified
+    """
+    store = get_store()
+    sampled = {repo: [commit.get('sha') for commit in commits[:sample_size] if commit.get('sha')]
+               for repo, commits in commits_by_repo.items()}
+    known = store.get_many([sha for shas in sampled.values() for sha in shas])
+
+    missing = [(repo, sha) for repo, shas in sampled.items() for sha in dict.fromkeys(shas) if sha not in known]
+    fetched = await asyncio.gather(*(_fetch_and_store(user, repo, sha) for repo, sha in missing))
+    known.update((sha, stats) for (_, sha), stats in zip(missing, fetched) if stats is not None)
+
+    result = {}
+    for repo, commits in commits_by_repo.items():
+        commits = list(commits)
+        for index, commit in enumerate(commits[:sample_size]):
+            stats = known.get(commit.get('sha'))
+            if stats is not None:
+                commits[index] = {**commit, 'additions': stats[0], 'deletions': stats[1]}
+        result[repo] = commits
+    return result
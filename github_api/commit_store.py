@@ -0,0 +1,245 @@
+"""
+Persistent per-repository commit history kept in step with Github incrementally
+
+Each repository records the newest commit it has synced (its high-water mark).
+A later sync asks only for commits since that commit's date and prepends the
+new ones, and older history is backfilled with `until` when a caller needs more
+commits than are stored, so re-grading costs requests in proportion to the new
+commits rather than to the length of the history
+"""
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import List, Optional
+from github_api import http_client
+from github_api.commit_cache import CANONICAL_PER_PAGE, CACHE_TTL, parse_commit
+
+STORE_PATH = os.getenv("GITHUB_COMMIT_STORE_PATH", ".github_commits.sqlite3")
+STORE_ENABLED = os.getenv("GITHUB_COMMIT_STORE", "1") == "1"
+# A repository synced more recently than this is served from the store without a request
+SYNC_INTERVAL = float(os.getenv("GITHUB_COMMIT_SYNC_INTERVAL", CACHE_TTL))
+
+class CommitStore:
+    """
+    SQLite store of parsed commits per (owner, repo), ordered as Github lists them
+    seq orders the commits newest first: synced commits get lower numbers than
+    everything stored, backfilled ones higher
+    """
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        # Concurrent callers for the same repository wait for a single sync
+        self._repo_locks = weakref.WeakValueDictionary()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS repos (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                newest_sha TEXT,
+                newest_date TEXT,
+                oldest_date TEXT,
+                complete INTEGER NOT NULL DEFAULT 0,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (owner, repo)
+            )''')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS commits (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                committed_date TEXT NOT NULL,
+                date TEXT NOT NULL,
+                message TEXT NOT NULL,
+                additions INTEGER NOT NULL,
+                deletions INTEGER NOT NULL,
+                PRIMARY KEY (owner, repo, sha)
+            )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS commits_seq ON commits (owner, repo, seq)')
+
+    def _state(self, owner: str, repo: str) -> Optional[tuple]:
+        with self._lock:
+            return self._db.execute(
+                'SELECT newest_sha, newest_date, oldest_date, complete, synced_at FROM repos '
+                'WHERE owner = ? AND repo = ?', (owner, repo)).fetchone()
+
+    def _count(self, owner: str, repo: str) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM commits WHERE owner = ? AND repo = ?',
+                                    (owner, repo)).fetchone()[0]
+
+    def _repo_lock(self, owner: str, repo: str) -> threading.Lock:
+        with self._lock:
+            lock = self._repo_locks.get((owner, repo))
+            if lock is None:
+                lock = threading.Lock()
+                self._repo_locks[(owner, repo)] = lock
+            return lock
+
+    def _add(self, owner: str, repo: str, commits: List[tuple], prepend: bool) -> int:
+        """
+        Stores (raw, parsed) commits in listing order, skipping ones already stored
+        Returns the number of new commits
+        """
+        if not commits:
+            return 0
+        with self._lock:
+            stored = {row[0] for row in self._db.execute(
+                f'SELECT sha FROM commits WHERE owner = ? AND repo = ? AND sha IN ({",".join("?" * len(commits))})',
+                (owner, repo, *(parsed['sha'] for _, parsed in commits)))}
+            new = [(raw, parsed) for raw, parsed in commits if parsed['sha'] not in stored]
+            if not new:
+                return 0
+            if prepend:
+                first = self._db.execute('SELECT COALESCE(MIN(seq), 0) FROM commits WHERE owner = ? AND repo = ?',
+                                         (owner, repo)).fetchone()[0] - len(new)
+            else:
+                first = self._db.execute('SELECT COALESCE(MAX(seq), -1) FROM commits WHERE owner = ? AND repo = ?',
+                                         (owner, repo)).fetchone()[0] + 1
+            self._db.executemany('INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+                (owner, repo, parsed['sha'], first + index, get_committed_date(raw),
+                 parsed['date'], parsed['message'], parsed['additions'], parsed['deletions'])
+                for index, (raw, parsed) in enumerate(new)
+            ])
+            return len(new)
+
+    def _update_state(self, owner: str, repo: str, complete: Optional[bool] = None, synced: bool = True):
+        with self._lock:
+            newest = self._db.execute(
+                'SELECT sha, committed_date FROM commits WHERE owner = ? AND repo = ? ORDER BY seq LIMIT 1',
+                (owner, repo)).fetchone() or (None, None)
+            oldest = self._db.execute(
+                'SELECT committed_date FROM commits WHERE owner = ? AND repo = ? ORDER BY seq DESC LIMIT 1',
+                (owner, repo)).fetchone() or (None,)
+            state = self._state(owner, repo)
+            if complete is None:
+                complete = bool(state and state[3])
+            synced_at = time.time() if synced else (state[4] if state else 0)
+            self._db.execute('INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (owner, repo, newest[0], newest[1], oldest[0], int(complete), synced_at))
+
+    def sync(self, owner: str, repo: str, limit: Optional[int] = None):
+        """
+        Brings the stored history of a repository up to date and makes sure it
+        holds at least `limit` commits (all of them when limit is None) when
+        Github has that many
+        """
+        with self._repo_lock(owner, repo):
+            state = self._state(owner, repo)
+            due = state is None or time.time() - state[4] > SYNC_INTERVAL
+            if state is None or state[0] is None:
+                # Nothing stored yet, or a repository that had no commits
+                if due:
+                    complete = self._fetch(owner, repo, {}, limit, prepend=False)
+                    # A failed first page stores nothing, so the next call tries again
+                    if complete is not None:
+                        self._update_state(owner, repo, complete)
+                return
+
+            if due:
+                # Only commits since the high-water mark; the newest stored one comes back and is skipped
+                if self._fetch(owner, repo, {'since': state[1]}, None, prepend=True):
+                    self._update_state(owner, repo)
+
+            state = self._state(owner, repo)
+            stored = self._count(owner, repo)
+            if not state[3] and (limit is None or stored < limit):
+                complete = self._fetch(owner, repo, {'until': state[2]}, None if limit is None else limit - stored,
+                                       prepend=False)
+                if complete is not None:
+                    self._update_state(owner, repo, complete, synced=False)
+
+    def _fetch(self, owner: str, repo: str, params: dict, limit: Optional[int], prepend: bool) -> Optional[bool]:
+        """
+        Pages through a commit listing, storing new commits until `limit` of them
+        were added; synced pages are all fetched before any is stored so the
+        prepended commits keep their listing order
+        Returns True when the listing was read to its end, or None when its
+        first page could not be fetched
+        """
+        added = 0
+        pending = []
+        page = 1
+        complete = False
+        while limit is None or added < limit:
+            page_commits = fetch_raw_page(owner, repo, page, params)
+            if page_commits is None:
+                if page == 1:
+                    return None
+                break
+            commits = [(commit, parse_commit(commit)) for commit in page_commits]
+            if prepend:
+                pending.extend(commits)
+            else:
+                added += self._add(owner, repo, commits, prepend=False)
+            if len(page_commits) < CANONICAL_PER_PAGE:
+                complete = True
+                break
+            page += 1
+        # A sync cut short would leave a gap below the new commits, so it is dropped
+        if prepend and complete:
+            self._add(owner, repo, pending, prepend=True)
+        return complete
+
+    def get_commits(self, owner: str, repo: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Syncs a repository and returns up to `limit` of its newest commits
+        """
+        self.sync(owner, repo, limit)
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT message, additions, deletions, date, sha FROM commits '
+                'WHERE owner = ? AND repo = ? ORDER BY seq LIMIT ?',
+                (owner, repo, -1 if limit is None else limit)).fetchall()
+        return [{'message': message, 'additions': additions, 'deletions': deletions, 'date': date, 'sha': sha}
+                for message, additions, deletions, date, sha in rows]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM commits')
+            self._db.execute('DELETE FROM repos')
+
+def get_committed_date(commit: dict) -> str:
+    """
+    Committer date of a listing entry, which is what `since` and `until` filter on
+    """
+    commit_data = commit.get('commit', {})
+    return ((commit_data.get('committer') or {}).get('date')
+            or (commit_data.get('author') or {}).get('date', ''))
+
+def fetch_raw_page(owner: str, repo: str, page: int, params: dict) -> Optional[List[dict]]:
+    """
+    Fetches one canonical page of a commit listing, newest first
+    Returns None when the page could not be fetched
+    """
+    try:
+        response = http_client.get(f'/repos/{owner}/{repo}/commits',
+                                   params={'per_page': CANONICAL_PER_PAGE, 'page': page, **params})
+        if response.status_code == 409:
+            # Github's answer for a repository without commits
+            return []
+        if response.status_code != 200:
+            print(f"Error fetching commits for {repo}: {response.status_code}")
+            return None
+        return response.json()
+    except Exception as e:
+        print(f"Error processing commits for {repo}: {str(e)}")
+        return None
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> Optional[CommitStore]:
+    """
+    Returns the shared commit store, opening it on first use, or None when disabled
+    """
+    global _store
+    if not STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = CommitStore()
+        return _store
@@ -0,0 +1,102 @@
+import asyncio
+import math
+from typing import Iterable
+from github_api.profile_data import get_user_profile, iter_repo_pages
+from github_api import popularity_data, activity_data, code_quality_data, collaboration_data, async_client
+
+SECTIONS = ('popularity', 'activity', 'code_quality', 'collaboration')
+
+# Github endpoints each section is computed from
+SECTION_ENDPOINTS = {
+    'popularity': {'user'},
+    'activity': {'commits'},
+    'code_quality': {'languages', 'commits'},
+    'collaboration': {'issues'},
+}
+
+def get_required_endpoints(sections: Iterable[str]) -> set:
+    """
+    Returns the set of Github endpoints needed to compute the given sections
+    """
+    endpoints = set()
+    for section in sections:
+        endpoints |= SECTION_ENDPOINTS[section]
+    return endpoints
+
+def get_commit_view(sections: Iterable[str]):
+    """
+    Returns the (per_page, max_pages) commit view that covers every requested section;
+    max_pages 0 stands for the full history
+    """
+    views = []
+    if 'activity' in sections:
+        views.append((activity_data.COMMITS_PER_PAGE, activity_data.COMMIT_PAGES))
+    if 'code_quality' in sections:
+        views.append((code_quality_data.COMMITS_PER_PAGE, code_quality_data.COMMIT_PAGES))
+    return max(views, key=lambda view: view[0] * view[1] if view[1] else math.inf)
+
+def get_complete_profile_data(user: str, sections: Iterable[str] = SECTIONS):
+    """
+    Crawls the user's repositories once and computes every requested section from
+    the shared data, fetching each Github endpoint at most once per repository
+    Returns a dictionary with the repository names and one dictionary per section
+    """
+    return async_client.run_sync(get_complete_profile_data_async(user, sections))
+
+async def get_complete_profile_data_async(user: str, sections: Iterable[str] = SECTIONS):
+    """
+    Asynchronous version of get_complete_profile_data that fetches the repositories concurrently
+    """
+    sections = [section for section in SECTIONS if section in set(sections)]
+    endpoints = get_required_endpoints(sections)
+
+    # Search counts need no repository listing, so they run alongside the profile request
+    counts = asyncio.ensure_future(collaboration_data.get_counts_async(user)) if 'collaboration' in sections else None
+    user_profile = await async_client.call(user, get_user_profile, user) if 'user' in endpoints else {}
+    followers, following = user_profile.get('followers', 0), user_profile.get('following', 0)
+
+    commits_by_repo = {}
+    languages_by_repo = {}
+    issue_items_by_repo = {}
+    fetchers = []
+    if 'commits' in endpoints:
+        per_page, max_pages = get_commit_view(sections)
+        fetchers.append((commits_by_repo, activity_data.get_repo_commits,
+                         {'per_page': per_page, 'max_pages': max_pages}))
+    if 'languages' in endpoints:
+        fetchers.append((languages_by_repo, code_quality_data.get_repo_languages, {}))
+    if counts is not None:
+        counts = await counts
+    if 'issues' in endpoints and counts is None:
+        # Pull requests come from the same issue listing, crawled only without search counts
+        fetchers.append((issue_items_by_repo, collaboration_data.get_issue_items, {}))
+
+    pages = {}
+    fetches = []
+    # Per-repo work starts as soon as each page of the listing arrives
+    async for page, page_repos in async_client.iterate(iter_repo_pages(user, user_profile.get('public_repos'))):
+        pages[page] = page_repos
+        for results, fetch, kwargs in fetchers:
+            fetches.append((results, asyncio.ensure_future(
+                async_client.map_repos(user, page_repos, fetch, **kwargs))))
+    fetched = await asyncio.gather(*(future for _, future in fetches))
+    for (results, _), repo_results in zip(fetches, fetched):
+        results.update(repo_results)
+    repos = [repo for page in sorted(pages) for repo in pages[page]]
+
+    profile = {'username': user, 'repositories': [repo.name for repo in repos]}
+    if 'popularity' in sections:
+        profile['popularity'] = popularity_data.build_popularity_data(repos, followers, following)
+    if 'activity' in sections:
+        profile['activity'] = activity_data.build_activity_data(repos, commits_by_repo)
+    if 'code_quality' in sections:
+        commits_by_repo = await code_quality_data.add_commit_stats_async(user, commits_by_repo)
+        profile['code_quality'] = code_quality_data.build_code_quality_data(repos, languages_by_repo, commits_by_repo)
+    if 'collaboration' in sections:
+        prs_by_repo, issues_by_repo = collaboration_data.split_issue_items(issue_items_by_repo)
+        if counts is not None:
+            # The listings were not crawled
+            prs_by_repo = issues_by_repo = None
+        profile['collaboration'] = collaboration_data.build_collaboration_data(repos, prs_by_repo, issues_by_repo,
+                                                                               counts)
+    return profile
@@ -0,0 +1,269 @@
+"""
+GraphQL alternative to the REST crawl: one query returns up to
+GRAPHQL_REPOS_PER_PAGE repositories with their counts, languages, pull requests,
+issues and recent commit history, and the results are fed to the same build_*
+functions the REST collectors use, so both backends fill the same dicts
+
+Differences from the REST crawl: watchers are subscriber counts (REST's
+watchers_count mirrors stars), pull requests carry their real additions and
+deletions, and languages are limited to the 50 largest per repository
+"""
+import asyncio
+import math
+import os
+from typing import Iterable, List
+from github_api import http_client, async_client
+from github_api.profile_data import Repository
+from github_api import activity_data, code_quality_data, collaboration_data, popularity_data
+from github_api.complete_profile_data import SECTIONS, get_commit_view
+
+GRAPHQL_PATH = os.getenv("GITHUB_GRAPHQL_PATH", '/graphql')
+GRAPHQL_REPOS_PER_PAGE = int(os.getenv("GRAPHQL_REPOS_PER_PAGE", 100))
+HISTORY_PAGE_SIZE = 100
+HISTORY_REPOS_PER_QUERY = 10
+
+USER_REPOSITORIES_QUERY = '''
+query UserRepositories($login: String!, $first: Int!, $after: String, $history: Int!,
+                       $withHistory: Boolean!, $withLanguages: Boolean!, $withCollaboration: Boolean!) {
+  user(login: $login) {
+    followers { totalCount }
+    following { totalCount }
+    repositories(first: $first, after: $after, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        stargazerCount
+        watchers { totalCount }
+        forkCount
+        primaryLanguage { name }
+        pushedAt
+        languages(first: 50, orderBy: {field: SIZE, direction: DESC}) @include(if: $withLanguages) {
+          edges { size node { name } }
+        }
+        pullRequests(first: 100, orderBy: {field: CREATED_AT, direction: DESC}) @include(if: $withCollaboration) {
+          nodes { state additions deletions changedFiles comments { totalCount } }
+        }
+        issues(first: 100, orderBy: {field: CREATED_AT, direction: DESC}) @include(if: $withCollaboration) {
+          nodes { state comments { totalCount } }
+        }
+        defaultBranchRef @include(if: $withHistory) {
+          target {
+            ... on Commit {
+              history(first: $history) {
+                pageInfo { hasNextPage endCursor }
+                nodes { oid message authoredDate }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+HISTORY_FIELD = '''
+  {alias}: repository(owner: $owner, name: ${alias}_name) {{
+    defaultBranchRef {{
+      target {{
+        ... on Commit {{
+          history(first: {page_size}, after: ${alias}_after) {{
+            pageInfo {{ hasNextPage endCursor }}
+            nodes {{ oid message authoredDate }}
+          }}
+        }}
+      }}
+    }}
+  }}'''
+
+def run_query(query: str, variables: dict, operation_name: str) -> dict:
+    """
+    Sends a GraphQL query and returns its data, raising on transport or query errors
+    """
+    response = http_client.post(GRAPHQL_PATH, json={
+        'query': query, 'variables': variables, 'operationName': operation_name
+    })
+    if response.status_code != 200:
+        raise RuntimeError(f"GraphQL {operation_name} failed: {response.status_code}")
+    payload = response.json()
+    if payload.get('errors'):
+        raise RuntimeError(f"GraphQL {operation_name} errors: {payload['errors']}")
+    return payload.get('data') or {}
+
+def parse_history(history: dict) -> List[dict]:
+    return [{
+        'message': node.get('message', ''),
+        'additions': 0,
+        'deletions': 0,
+        'date': node.get('authoredDate', ''),
+        'sha': node.get('oid', '')
+    } for node in history.get('nodes') or []]
+
+def get_history(node: dict) -> dict:
+    target = (node.get('defaultBranchRef') or {}).get('target') or {}
+    return target.get('history') or {}
+
+def fetch_user_data(user: str, sections: Iterable[str] = SECTIONS) -> dict:
+    """
+    Fetches everything the requested sections need with paginated GraphQL queries
+    Returns the profile counts, Repository records and per-repo languages,
+    pull requests, issues and commits keyed by repository name
+    """
+    sections = set(sections)
+    commit_limit = 0
+    if 'activity' in sections or 'code_quality' in sections:
+        per_page, max_pages = get_commit_view(sections)
+        commit_limit = per_page * max_pages if max_pages else math.inf
+
+    data = {'followers': 0, 'following': 0, 'repos': [], 'languages': {},
+            'prs': {}, 'issues': {}, 'commits': {}}
+    history_cursors = {}
+    after = None
+    while True:
+        result = run_query(USER_REPOSITORIES_QUERY, {
+            'login': user,
+            'first': GRAPHQL_REPOS_PER_PAGE,
+            'after': after,
+            'history': min(HISTORY_PAGE_SIZE, max(commit_limit, 1)),
+            'withHistory': commit_limit > 0,
+            'withLanguages': 'code_quality' in sections,
+            'withCollaboration': 'collaboration' in sections,
+        }, 'UserRepositories')
+        user_node = result.get('user')
+        if not user_node:
+            print(f"Error fetching GraphQL data for {user}: user not found")
+            return data
+        data['followers'] = user_node['followers']['totalCount']
+        data['following'] = user_node['following']['totalCount']
+
+        repositories = user_node['repositories']
+        for node in repositories['nodes']:
+            name = node['name']
+            data['repos'].append(Repository(
+                name=name,
+                stargazers_count=node.get('stargazerCount', 0),
+                watchers_count=(node.get('watchers') or {}).get('totalCount', 0),
+                forks_count=node.get('forkCount', 0),
+                language=(node.get('primaryLanguage') or {}).get('name'),
+                pushed_at=node.get('pushedAt') or ''
+            ))
+            if 'languages' in node:
+                data['languages'][name] = {edge['node']['name']: edge['size']
+                                           for edge in (node['languages'] or {}).get('edges', [])}
+            if 'pullRequests' in node:
+                data['prs'][name] = [{
+                    'state': 'open' if pr['state'] == 'OPEN' else 'closed',
+                    'additions': pr.get('additions', 0),
+                    'deletions': pr.get('deletions', 0),
+                    'changed_files': pr.get('changedFiles', 0),
+                    'merged': pr['state'] == 'MERGED',
+                    'comments': pr['comments']['totalCount']
+                } for pr in node['pullRequests']['nodes']]
+            if 'issues' in node:
+                data['issues'][name] = [{
+                    'state': issue['state'].lower(),
+                    'comments': issue['comments']['totalCount'],
+                    'closed': issue['state'] == 'CLOSED'
+                } for issue in node['issues']['nodes']]
+            if commit_limit:
+                history = get_history(node)
+                data['commits'][name] = parse_history(history)
+                page_info = history.get('pageInfo') or {}
+                if page_info.get('hasNextPage') and len(data['commits'][name]) < commit_limit:
+                    history_cursors[name] = page_info['endCursor']
+
+        page_info = repositories['pageInfo']
+        if not page_info['hasNextPage']:
+            break
+        after = page_info['endCursor']
+
+    fetch_remaining_history(user, data['commits'], history_cursors, commit_limit)
+    return data
+
+def fetch_remaining_history(user: str, commits: dict, cursors: dict, commit_limit: float):
+    """
+    Pages through the commit history of repositories with more than one page,
+    batching HISTORY_REPOS_PER_QUERY repositories into each query
+    """
+    while cursors:
+        batch = list(cursors.items())[:HISTORY_REPOS_PER_QUERY]
+        aliases = [f'r{index}' for index in range(len(batch))]
+        declarations = ''.join(f', ${alias}_name: String!, ${alias}_after: String' for alias in aliases)
+        fields = ''.join(HISTORY_FIELD.format(alias=alias, page_size=HISTORY_PAGE_SIZE) for alias in aliases)
+        query = f'query RepositoryHistory($owner: String!{declarations}) {{{fields}\n}}'
+        variables = {'owner': user}
+        for alias, (name, cursor) in zip(aliases, batch):
+            variables[f'{alias}_name'] = name
+            variables[f'{alias}_after'] = cursor
+
+        result = run_query(query, variables, 'RepositoryHistory')
+        for alias, (name, _) in zip(aliases, batch):
+            history = get_history(result.get(alias) or {})
+            commits[name].extend(parse_history(history))
+            page_info = history.get('pageInfo') or {}
+            if page_info.get('hasNextPage') and len(commits[name]) < commit_limit:
+                cursors[name] = page_info['endCursor']
+            else:
+                del cursors[name]
+                if len(commits[name]) > commit_limit:
+                    commits[name] = commits[name][:commit_limit]
+
+def get_complete_profile_data(user: str, sections: Iterable[str] = SECTIONS):
+    """
+    GraphQL version of complete_profile_data.get_complete_profile_data
+    """
+    return async_client.run_sync(get_complete_profile_data_async(user, sections))
+
+def get_popularity_data(user: str):
+    return get_complete_profile_data(user, ['popularity'])['popularity']
+
+def get_activity_data(user: str):
+    return get_complete_profile_data(user, ['activity'])['activity']
+
+def get_code_quality_data(user: str):
+    return get_complete_profile_data(user, ['code_quality'])['code_quality']
+
+def get_collaboration_data(user: str):
+    return get_complete_profile_data(user, ['collaboration'])['collaboration']
+
+async def get_complete_profile_data_async(user: str, sections: Iterable[str] = SECTIONS):
+    """
+    GraphQL queries run one after another, so the query crawl holds a single
+    request slot; commit details and search counts take their own slots once
+    it is done, outside of it
+    """
+    sections = [section for section in SECTIONS if section in set(sections)]
+    counts = asyncio.ensure_future(collaboration_data.get_counts_async(user)) if 'collaboration' in sections else None
+    try:
+        data = await async_client.call(user, fetch_user_data, user, sections)
+    except BaseException:
+        if counts is not None:
+            counts.cancel()
+        raise
+    repos = data['repos']
+    profile = {'username': user, 'repositories': [repo.name for repo in repos]}
+    if 'popularity' in sections:
+        profile['popularity'] = popularity_data.build_popularity_data(repos, data['followers'], data['following'])
+    if 'activity' in sections:
+        profile['activity'] = activity_data.build_activity_data(repos, data['commits'])
+    if 'code_quality' in sections:
+        # Commit details come from the REST endpoint and its stats store, as for the REST crawl
+        commits = await code_quality_data.add_commit_stats_async(user, data['commits'])
+        profile['code_quality'] = code_quality_data.build_code_quality_data(repos, data['languages'], commits)
+    if 'collaboration' in sections:
+        profile['collaboration'] = collaboration_data.build_collaboration_data(repos, data['prs'], data['issues'],
+                                                                               await counts)
+    return profile
+
+async def get_popularity_data_async(user: str):
+    return (await get_complete_profile_data_async(user, ['popularity']))['popularity']
+
+async def get_activity_data_async(user: str):
+    return (await get_complete_profile_data_async(user, ['activity']))['activity']
+
+async def get_code_quality_data_async(user: str):
+    return (await get_complete_profile_data_async(user, ['code_quality']))['code_quality']
+
+async def get_collaboration_data_async(user: str):
+    return (await get_complete_profile_data_async(user, ['collaboration']))['collaboration']
@@ -0,0 +1,187 @@
+import os
+import re
+import threading
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from github_api import response_cache, rate_limit
+load_dotenv()
+base_url = os.getenv("GITHUB_API_URL", 'https://api.github.com')
+
+# The pool holds one keep-alive connection per server worker thread by default
+POOL_CONNECTIONS = int(os.getenv("GITHUB_POOL_CONNECTIONS", 4))
+POOL_MAXSIZE = int(os.getenv("GITHUB_POOL_MAXSIZE", 10))
+POOL_BLOCK = os.getenv("GITHUB_POOL_BLOCK", "1") == "1"
+# Times a rate limited request is retried, on another token when one has budget
+RATE_LIMIT_RETRIES = int(os.getenv("GITHUB_RATE_LIMIT_RETRIES", 3))
+
+ENDPOINT_PATTERNS = [
+    (re.compile(r'^/repos/[^/]+/[^/]+/commits/[^/]+$'), '/repos/{owner}/{repo}/commits/{sha}'),
+    (re.compile(r'^/repos/[^/]+/[^/]+'), '/repos/{owner}/{repo}'),
+    (re.compile(r'^/users/[^/]+'), '/users/{user}'),
+]
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {}
+
+def get_endpoint(path: str) -> str:
+    """
+    Normalizes a request path into its endpoint template, e.g.
+    /repos/octocat/hello/commits -> /repos/{owner}/{repo}/commits
+    """
+    for pattern, template in ENDPOINT_PATTERNS:
+        match = pattern.match(path)
+        if match:
+            return template + path[match.end():]
+    return path
+
+def _record(endpoint: str, field: str):
+    with _stats_lock:
+        endpoint_stats = _stats.setdefault(endpoint, {'requests': 0, 'new_connections': 0, 'not_modified': 0})
+        endpoint_stats[field] += 1
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _record(getattr(_local, 'endpoint', None) or 'unknown', 'new_connections')
+        return super()._new_conn()
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _record(getattr(_local, 'endpoint', None) or 'unknown', 'new_connections')
+        return super()._new_conn()
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools count every new connection they open,
+    so connection reuse can be reported per endpoint
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+def create_session(pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                   pool_block: bool = POOL_BLOCK) -> requests.Session:
+    """
+    Creates a keep-alive session backed by a bounded connection pool
+    """
+    new_session = requests.Session()
+    new_session.headers['Connection'] = 'keep-alive'
+    adapter = PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                            pool_block=pool_block)
+    new_session.mount('https://', adapter)
+    new_session.mount('http://', adapter)
+    return new_session
+
+session = create_session()
+
+def configure_pool(pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                   pool_block: bool = POOL_BLOCK):
+    """
+    Replaces the shared session with one using the given pool limits
+    """
+    global session
+    old_session = session
+    session = create_session(pool_connections, pool_maxsize, pool_block)
+    old_session.close()
+
+def get(path: str, params: dict = None, **kwargs) -> requests.Response:
+    """
+    Sends a GET request for a Github API path (e.g. /users/octocat/repos)
+    through the shared keep-alive session
+    Responses with an ETag or Last-Modified are stored in the response cache and
+    revalidated with a conditional request; a 304 is served from the cache
+    max_wait (seconds) overrides how long the request may wait for rate limit quota
+    """
+    endpoint = get_endpoint(path)
+    url = f'{base_url}{path}'
+    cache = response_cache.get_cache()
+    cache_key = response_cache.make_key(url, params)
+    cached = cache.get(cache_key) if cache else None
+    request_headers = dict(kwargs.pop('headers', None) or {})
+    if cached:
+        if cached.etag:
+            request_headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            request_headers['If-Modified-Since'] = cached.last_modified
+
+    response = _send('GET', path, url, params=params, headers=request_headers, **kwargs)
+    if response.status_code == 304 and cached:
+        _record(endpoint, 'not_modified')
+        cache.touch(cache_key)
+        return _from_cache(response, cached)
+    if cache and response.status_code == 200:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            stored_headers = {name: response.headers[name]
+                              for name in response_cache.STORED_HEADERS if name in response.headers}
+            cache.put(cache_key, etag, last_modified, response.content, stored_headers)
+    return response
+
+def post(path: str, json: dict = None, **kwargs) -> requests.Response:
+    """
+    Sends a POST request (e.g. a GraphQL query) through the shared keep-alive session
+    """
+    return _send('POST', path, f'{base_url}{path}', json=json, **kwargs)
+
+def _send(method: str, path: str, url: str, headers: dict = None, max_wait: float = rate_limit.MAX_WAIT,
+          **kwargs) -> requests.Response:
+    """
+    Sends a request with a token from the rate limit scheduler, retrying when
+    Github answers with a primary or secondary rate limit
+    """
+    endpoint = get_endpoint(path)
+    resource = rate_limit.get_resource(path)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        scheduler = rate_limit.scheduler
+        token = scheduler.acquire(resource, max_wait)
+        request_headers = dict(headers or {})
+        request_headers['Authorization'] = f'token {token}' if token else None
+        _record(endpoint, 'requests')
+        _local.endpoint = endpoint
+        try:
+            response = session.request(method, url, headers=request_headers, **kwargs)
+        except Exception:
+            scheduler.release(token, resource)
+            raise
+        finally:
+            _local.endpoint = None
+        limited = scheduler.release(token, resource, response.headers, response.status_code)
+        if not limited or attempt == RATE_LIMIT_RETRIES:
+            return response
+
+def _from_cache(response: requests.Response, cached: response_cache.CachedResponse) -> requests.Response:
+    """
+    Turns a 304 response into the cached 200 response it revalidated
+    """
+    response.status_code = 200
+    response._content = cached.body
+    response.headers.update(cached.headers)
+    response.from_cache = True
+    return response
+
+def get_connection_stats() -> dict:
+    """
+    Returns request and connection counts per endpoint; reused is the number
+    of requests that were served without opening a new connection and
+    not_modified the number answered with a 304 from the response cache
+    """
+    with _stats_lock:
+        return {
+            endpoint: {
+                'requests': endpoint_stats['requests'],
+                'new_connections': endpoint_stats['new_connections'],
+                'reused': max(0, endpoint_stats['requests'] - endpoint_stats['new_connections']),
+                'not_modified': endpoint_stats['not_modified']
+            }
+            for endpoint, endpoint_stats in _stats.items()
+        }
+
+def reset_connection_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,123 @@
+"""
+Issues and pull requests of a repository from one paginated /issues crawl
+
+Github's issue listing includes pull requests, marked by a pull_request field
+whose merged_at tells whether the pull request was merged, so a single crawl
+serves both. A repository is crawled once; later refreshes only ask for items
+updated since the newest update already seen and merge them in by number
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from github_api import http_client
+
+ISSUES_PER_PAGE = 100
+# Pages read per crawl or refresh of a repository; 0 reads every page
+ISSUE_PAGES = int(os.getenv("ISSUE_PAGES", 10))
+# A repository refreshed more recently than this is served without a request
+SYNC_INTERVAL = float(os.getenv("ISSUE_SYNC_INTERVAL", 300))
+CACHE_MAX_REPOS = int(os.getenv("ISSUE_CACHE_MAX_REPOS", 2048))
+
+class _RepoItems:
+    __slots__ = ('lock', 'items', 'updated_at', 'synced_at')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Parsed items by issue number
+        self.items = {}
+        # Newest updated_at seen, the `since` of the next refresh
+        self.updated_at = None
+        self.synced_at = None
+
+_entries = OrderedDict()
+_entries_lock = threading.Lock()
+
+def parse_item(item: dict) -> dict:
+    """
+    Keeps the fields of an issue listing entry that the metrics use
+    """
+    pull_request = item.get('pull_request')
+    return {
+        'number': item.get('number'),
+        'state': item.get('state'),
+        'comments': item.get('comments', 0),
+        'updated_at': item.get('updated_at') or '',
+        'pull_request': bool(pull_request),
+        'merged': bool((pull_request or {}).get('merged_at'))
+    }
+
+def fetch_item_page(owner: str, repo: str, page: int, params: dict) -> Optional[List[dict]]:
+    """
+    Fetches one page of a repository's issues and pull requests
+    Returns None when the page could not be fetched
+    """
+    try:
+        response = http_client.get(f'/repos/{owner}/{repo}/issues',
+                                   params={'state': 'all', 'per_page': ISSUES_PER_PAGE, 'page': page, **params})
+        if response.status_code != 200:
+            print(f"Error fetching issues for {repo}: {response.status_code}")
+            return None
+        return [parse_item(item) for item in response.json()]
+    except Exception as e:
+        print(f"Error processing issues for {repo}: {str(e)}")
+        return None
+
+def _crawl(entry: _RepoItems, owner: str, repo: str, params: dict) -> bool:
+    """
+    Pages through a listing into entry, stopping after ISSUE_PAGES pages
+    Returns False when the first page could not be fetched
+    """
+    page = 1
+    while not ISSUE_PAGES or page <= ISSUE_PAGES:
+        items = fetch_item_page(owner, repo, page, params)
+        if items is None:
+            return page > 1
+        for item in items:
+            entry.items[item['number']] = item
+            if item['updated_at'] and (entry.updated_at is None or item['updated_at'] > entry.updated_at):
+                entry.updated_at = item['updated_at']
+        if len(items) < ISSUES_PER_PAGE:
+            break
+        page += 1
+    return True
+
+def _get_entry(owner: str, repo: str) -> _RepoItems:
+    key = (owner, repo)
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _RepoItems()
+            _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > CACHE_MAX_REPOS:
+            _entries.popitem(last=False)
+        return entry
+
+def get_items(owner: str, repo: str) -> List[dict]:
+    """
+    Returns the issues and pull requests of a repository
+    The first call crawls the newest ISSUE_PAGES pages; calls after
+    SYNC_INTERVAL fetch only the items updated since, oldest update first so an
+    interrupted refresh resumes where it stopped; concurrent callers for the
+    same repository wait for a single download
+    """
+    entry = _get_entry(owner, repo)
+    with entry.lock:
+        if entry.synced_at is None:
+            synced = _crawl(entry, owner, repo, {})
+        elif time.monotonic() - entry.synced_at > SYNC_INTERVAL:
+            params = {'sort': 'updated', 'direction': 'asc'}
+            if entry.updated_at:
+                params['since'] = entry.updated_at
+            synced = _crawl(entry, owner, repo, params)
+        else:
+            synced = False
+        if synced:
+            entry.synced_at = time.monotonic()
+        return list(entry.items.values())
+
+def clear():
+    with _entries_lock:
+        _entries.clear()
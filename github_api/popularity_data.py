@@ -1,29 +1,36 @@
-import requests
-import os
-from dotenv import load_dotenv
-from github_api.profile_data import get_all_repos
-load_dotenv()
-github_key = os.getenv("GITHUB_KEY")
-headers = {'Authorization': f'token {github_key}'}
-base_url = 'https://api.github.com'
+from typing import List
+from github_api.profile_data import get_all_repos, get_user_profile, Repository
+from github_api import http_client, async_client
 
 def get_popularity_data(user):
     """
     Small driver function to control popularity data
     Returns a dictionary that can be used to create PopularityData
     """
-    repos = get_all_repos(user)
+    return async_client.run_sync(get_popularity_data_async(user))
+
+async def get_popularity_data_async(user):
+    """
+    Asynchronous version of get_popularity_data
+    """
+    user_profile = await async_client.call(user, get_user_profile, user)
+    repos = await async_client.call(user, get_all_repos, user, public_repos=user_profile.get('public_repos'))
+    return build_popularity_data(repos, user_profile.get('followers', 0), user_profile.get('following', 0))
+
+def build_popularity_data(repos: List[Repository], followers: int, following: int):
+    """
+    Computes popularity metrics from the counts in the repository listing,
+    without any per-repository requests
+    """
     try:
-        followers, following = get_follows(user)
-        
         num_repos = 0
         stars = 0
         watchers = 0
         
         for repo in repos:
             num_repos += 1
-            stars += get_stargazers(user, repo)
-            watchers += get_watchers(user, repo)
+            stars += repo.stargazers_count
+            watchers += repo.watchers_count
 
         avg_stars = round(float(stars/num_repos), 2) if num_repos > 0 else 0.0
         avg_watchers = round(float(watchers/num_repos), 2) if num_repos > 0 else 0.0
@@ -52,16 +59,15 @@ def get_follows(user):
     """
     Get the follower and following metrics
     """
-    response = requests.get(f'{base_url}/users/{user}', headers=headers)
-    data = response.json()
-    return data.get('followers', 0), data.get('following', 0)
+    user_profile = get_user_profile(user)
+    return user_profile.get('followers', 0), user_profile.get('following', 0)
 
 def get_stargazers(user, repo):
     """
     Returns total stars for a repository
     """
     try:
-        response = requests.get(f'{base_url}/repos/{user}/{repo}', headers=headers)
+        response = http_client.get(f'/repos/{user}/{repo}')
         if response.status_code == 200:
             repo_data = response.json()
             return repo_data.get('stargazers_count', 0)
@@ -77,7 +83,7 @@ def get_watchers(user, repo):
     Returns total watchers for a repository
     """
     try:
-        response = requests.get(f'{base_url}/repos/{user}/{repo}', headers=headers)
+        response = http_client.get(f'/repos/{user}/{repo}')
         if response.status_code == 200:
             repo_data = response.json()
             return repo_data.get('watchers_count', 0)
@@ -93,7 +99,7 @@ def get_repository_metrics(user, repo):
     Get comprehensive repository metrics including forks, stars, watchers
     """
     try:
-        response = requests.get(f'{base_url}/repos/{user}/{repo}', headers=headers)
+        response = http_client.get(f'/repos/{user}/{repo}')
         if response.status_code == 200:
             data = response.json()
             return {
@@ -1,14 +1,24 @@
-import requests
 import os
-from dotenv import load_dotenv
-from typing import Tuple, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple, List, NamedTuple, Optional, Iterator
+from urllib.parse import urlparse, parse_qs
+from github_api import http_client
 
-load_dotenv()
-github_key = os.getenv("GITHUB_KEY")
-headers = {'Authorization': f'token {github_key}'}
-base_url = 'https://api.github.com'
+REPOS_PER_PAGE = 100
+REPO_PAGE_WORKERS = int(os.getenv("REPO_PAGE_WORKERS", 4))
 
-def get_profile_data() -> Tuple[str, List[str]]:
+class Repository(NamedTuple):
+    """
+    Compact record of the fields the metrics use from a repository listing entry
+    """
+    name: str
+    stargazers_count: int = 0
+    watchers_count: int = 0
+    forks_count: int = 0
+    language: Optional[str] = None
+    pushed_at: str = ''
+
+def get_profile_data() -> Tuple[str, List[Repository]]:
     """
     Small Driver function to collect profile_data and return
     it to the main collector.py file
@@ -21,18 +31,104 @@ def get_user() -> str:
     """
     Fetches the username associated with the github key
     """
-    response = requests.get(f'{base_url}/user', headers=headers).json()
+    response = http_client.get('/user').json()
     return response.get("login", None)
 
 
+def parse_repo(repo: dict) -> Repository:
+    return Repository(
+        name=repo['name'],
+        stargazers_count=repo.get('stargazers_count', 0),
+        watchers_count=repo.get('watchers_count', 0),
+        forks_count=repo.get('forks_count', 0),
+        language=repo.get('language'),
+        pushed_at=repo.get('pushed_at') or ''
+    )
+
+def get_user_profile(user) -> dict:
+    """
+    Fetches the public profile of a user (followers, following, public_repos, ...)
+    """
+    try:
+        response = http_client.get(f'/users/{user}')
+        if response.status_code != 200:
+            print(f"Error fetching profile for {user}: {response.status_code}")
+            return {}
+        return response.json()
+    except Exception as e:
+        print(f"Error getting profile for {user}: {str(e)}")
+        return {}
+
+def get_last_page(response) -> Optional[int]:
+    """
+    Reads the last page number from the Link header of a paginated response
+    """
+    last_url = response.links.get('last', {}).get('url')
+    if not last_url:
+        return None
+    pages = parse_qs(urlparse(last_url).query).get('page')
+    return int(pages[0]) if pages else None
+
+def fetch_repo_page(user, page: int) -> Tuple[List[Repository], Optional[int]]:
+    """
+    Fetches one page of the user's repositories
+    Returns the parsed repositories and the last page number, when known
+    """
+    try:
+        response = http_client.get(f'/users/{user}/repos',
+                                   params={'per_page': REPOS_PER_PAGE, 'page': page})
+        if response.status_code != 200:
+            print(f"Error fetching repos page {page} for {user}: {response.status_code}")
+            return [], None
+        return [parse_repo(repo) for repo in response.json()], get_last_page(response)
+    except Exception as e:
+        print(f"Error processing repos page {page} for {user}: {str(e)}")
+        return [], None
+
+def iter_repo_pages(user, public_repos: Optional[int] = None) -> Iterator[Tuple[int, List[Repository]]]:
+    """
+    Yields (page, repositories) as each page of the listing arrives
+    The page count comes from public_repos when given, otherwise from the
+    Link header of the first page; the remaining pages are fetched concurrently
+    """
+    if public_repos is not None:
+        first_page = 1
+        last_page = max(1, -(-public_repos // REPOS_PER_PAGE))
+    else:
+        repos, last_page = fetch_repo_page(user, 1)
+        yield 1, repos
+        if last_page is None:
+            return
+        first_page = 2
+
+    reported_last_page = last_page
+    with ThreadPoolExecutor(max_workers=REPO_PAGE_WORKERS) as executor:
+        futures = {executor.submit(fetch_repo_page, user, page): page
+                   for page in range(first_page, last_page + 1)}
+        for future in as_completed(futures):
+            repos, page_last_page = future.result()
+            reported_last_page = max(reported_last_page, page_last_page or 0)
+            yield futures[future], repos
+
+    # Repositories created since the page count was read spill onto later pages
+    for page in range(last_page + 1, reported_last_page + 1):
+        repos, _ = fetch_repo_page(user, page)
+        yield page, repos
+
+def iter_all_repos(user, public_repos: Optional[int] = None) -> Iterator[Repository]:
+    """
+    Streams the user's public repositories as their pages arrive, so per-repo
+    work can start while later pages are still in flight (not in listing order)
+    """
+    for _, repos in iter_repo_pages(user, public_repos):
+        yield from repos
 
-def get_all_repos(user) -> List[str]:
+def get_all_repos(user, public_repos: Optional[int] = None) -> List[Repository]:
     """
     Retrieves all public repositories and returns relevant info
     """
-    response = requests.get(f'{base_url}/users/{user}/repos', 
-                            headers=headers).json()
+    pages = dict(iter_repo_pages(user, public_repos))
     parsed_repos = []
-    for repo in response:
-        parsed_repos.append(repo['name'])
+    for page in sorted(pages):
+        parsed_repos.extend(pages[page])
     return parsed_repos
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+load_dotenv()
+
+# Comma separated pool of tokens; GITHUB_KEY alone still works
+TOKENS = [token.strip() for token in os.getenv("GITHUB_KEYS", os.getenv("GITHUB_KEY") or "").split(",") if token.strip()]
+# Requests left untouched on every token for other clients sharing it
+RESERVE = int(os.getenv("GITHUB_RATE_RESERVE", 10))
+# Longest a request waits for quota before giving up
+MAX_WAIT = float(os.getenv("GITHUB_RATE_MAX_WAIT", 300))
+# Wait after a secondary rate limit response that carries no Retry-After
+SECONDARY_LIMIT_WAIT = 60
+
+# Documented quota and window (seconds) of each resource until headers say otherwise
+DEFAULT_LIMITS = {'core': (5000, 3600), 'search': (30, 60), 'code_search': (10, 60), 'graphql': (5000, 3600)}
+ANONYMOUS_LIMITS = {'core': (60, 3600), 'search': (10, 60), 'code_search': (10, 60), 'graphql': (0, 3600)}
+
+class RateLimitError(RuntimeError):
+    pass
+
+def get_resource(path: str) -> str:
+    """
+    Rate limit resource a request path counts against
+    """
+    if path.startswith('/search/code'):
+        return 'code_search'
+    if path.startswith('/search'):
+        return 'search'
+    if path.startswith('/graphql'):
+        return 'graphql'
+    return 'core'
+
+def get_retry_after(value: str, now: float) -> float:
+    """
+    Seconds to wait from a Retry-After header, given as seconds or as an HTTP date
+    Falls back to SECONDARY_LIMIT_WAIT when the value cannot be read
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError, IndexError):
+        return SECONDARY_LIMIT_WAIT
+
+class Quota:
+    """
+    Token bucket for one token and resource: it holds at most limit requests,
+    refills at limit per window and is synced down to the X-RateLimit-Remaining
+    Github reports, so requests are paced instead of running into the cap
+    """
+    def __init__(self, limit: int, window: float):
+        now = time.time()
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset = now + window
+        self.level = float(limit)
+        self.updated = now
+        self.in_flight = 0
+        self.blocked_until = 0.0
+
+    def refill(self, now: float):
+        if now >= self.reset:
+            # Github restored the quota, start a new window
+            self.remaining = self.limit
+            self.reset = now + self.window
+            self.level = max(self.level, float(self.limit))
+        self.level = min(float(self.limit), self.level + (now - self.updated) * self.limit / self.window)
+        self.updated = now
+
+    def available(self) -> float:
+        return min(self.level, self.remaining - self.in_flight) - RESERVE
+
+    def wait_time(self, now: float) -> float:
+        """
+        Seconds until this bucket can take another request
+        """
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.remaining - self.in_flight - RESERVE < 1:
+            return max(self.reset - now, 0.0)
+        if self.level - RESERVE < 1:
+            return (1 + RESERVE - self.level) * self.window / max(self.limit, 1)
+        return 0.0
+
+class RateLimitScheduler:
+    """
+    Spreads requests across a pool of tokens, tracking the quota Github reports
+    for each token and resource and waiting out primary and secondary limits
+    """
+    def __init__(self, tokens: List[str] = None):
+        # None sends unauthenticated requests when no token is configured
+        self.tokens: List[Optional[str]] = list(tokens or []) or [None]
+        self._quotas: Dict[tuple, Quota] = {}
+        self._condition = threading.Condition()
+
+    def _quota(self, token: Optional[str], resource: str) -> Quota:
+        key = (token, resource)
+        if key not in self._quotas:
+            limits = DEFAULT_LIMITS if token else ANONYMOUS_LIMITS
+            self._quotas[key] = Quota(*limits.get(resource, (5000, 3600)))
+        return self._quotas[key]
+
+    def acquire(self, resource: str = 'core', max_wait: float = MAX_WAIT) -> Optional[str]:
+        """
+        Blocks until some token has budget for resource and returns it,
+        preferring the token with the most requests left
+        Raises RateLimitError when every token stays exhausted past max_wait
+        """
+        deadline = time.time() + max_wait
+        with self._condition:
+            while True:
+                now = time.time()
+                best, best_quota, wait = None, None, None
+                for token in self.tokens:
+                    quota = self._quota(token, resource)
+                    quota.refill(now)
+                    token_wait = quota.wait_time(now)
+                    if token_wait == 0 and (best_quota is None or quota.available() > best_quota.available()):
+                        best, best_quota = token, quota
+                    elif token_wait > 0:
+                        wait = token_wait if wait is None else min(wait, token_wait)
+                if best_quota is not None:
+                    best_quota.level -= 1
+                    best_quota.in_flight += 1
+                    return best
+                if now + wait > deadline:
+                    raise RateLimitError(f"Github {resource} rate limit exhausted for {wait:.0f}s")
+                self._condition.wait(wait)
+
+    def release(self, token: Optional[str], resource: str, headers=None, status_code: int = 200) -> bool:
+        """
+        Records the response to a request sent with token and syncs the quota
+        with its X-RateLimit-* headers
+        Returns True when the request hit a rate limit and should be retried
+        """
+        headers = headers or {}
+        now = time.time()
+        with self._condition:
+            quota = self._quota(token, resource)
+            quota.in_flight = max(0, quota.in_flight - 1)
+            # The response may report a different bucket than the path suggested
+            reported = headers.get('X-RateLimit-Resource')
+            if reported and reported != resource:
+                quota = self._quota(token, reported)
+            if 'X-RateLimit-Limit' in headers:
+                quota.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                quota.remaining = int(headers['X-RateLimit-Remaining'])
+                quota.level = min(quota.level, float(quota.remaining - quota.in_flight))
+            if 'X-RateLimit-Reset' in headers:
+                quota.reset = float(headers['X-RateLimit-Reset'])
+
+            limited = status_code in (403, 429) and (
+                'Retry-After' in headers or headers.get('X-RateLimit-Remaining') == '0')
+            if limited:
+                if 'Retry-After' in headers:
+                    # Secondary limits apply to the token as a whole
+                    until = now + get_retry_after(headers['Retry-After'], now)
+                    for (pool_token, _), pool_quota in self._quotas.items():
+                        if pool_token == token:
+                            pool_quota.blocked_until = max(pool_quota.blocked_until, until)
+                else:
+                    quota.remaining = 0
+                    quota.blocked_until = max(quota.blocked_until, quota.reset)
+            self._condition.notify_all()
+            return limited
+
+    def get_remaining_budget(self) -> dict:
+        """
+        Returns, per resource, the requests left across all tokens, the combined
+        limit and the earliest reset as an epoch timestamp
+        """
+        now = time.time()
+        budget = {}
+        with self._condition:
+            for (_, resource), quota in self._quotas.items():
+                quota.refill(now)
+                entry = budget.setdefault(resource, {'limit': 0, 'remaining': 0, 'reset': quota.reset, 'tokens': 0})
+                entry['limit'] += quota.limit
+                entry['remaining'] += max(0, quota.remaining - quota.in_flight)
+                entry['reset'] = min(entry['reset'], quota.reset)
+                entry['tokens'] += 1
+        return budget
+
+scheduler = RateLimitScheduler(TOKENS)
+
+def configure(tokens: List[str] = None):
+    """
+    Replaces the shared scheduler, e.g. with a different token pool
+    """
+    global scheduler
+    scheduler = RateLimitScheduler(TOKENS if tokens is None else tokens)
+
+def get_remaining_budget(resource: str = None) -> dict:
+    budget = scheduler.get_remaining_budget()
+    return budget.get(resource, {}) if resource else budget
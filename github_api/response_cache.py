@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", ".github_cache.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_ENABLED = os.getenv("GITHUB_CACHE", "1") == "1"
+
+# Response headers that have to survive a 304, e.g. Link for pagination
+STORED_HEADERS = ('Content-Type', 'Link')
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    headers: dict
+
+class ResponseCache:
+    """
+    Persistent store of Github response bodies with their ETag and Last-Modified
+    validators, evicting the least recently used entries past max_bytes
+    """
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                headers TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Returns the stored response without counting it as used; the caller
+        touches it once Github confirmed it is still current
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, last_modified, body, headers FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, body, headers = row
+        return CachedResponse(etag, last_modified, body, json.loads(headers))
+
+    def touch(self, key: str):
+        """
+        Marks an entry as recently used, e.g. when a 304 served it
+        """
+        with self._lock:
+            self._db.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+
+    def put(self, key: str, etag: Optional[str], last_modified: Optional[str], body: bytes, headers: dict):
+        size = len(body) + len(key)
+        with self._lock:
+            row = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, etag, last_modified, body, json.dumps(headers), size, time.time()))
+            self._total_bytes += size - (row[0] if row else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back to 90% of its budget
+        target = self.max_bytes * 0.9
+        # Other server processes may have written to the same file since the last count
+        self._total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        rows = self._db.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._db.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[ResponseCache]:
+    """
+    Returns the shared response cache, opening it on first use, or None when disabled
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+def make_key(url: str, params: Optional[dict]) -> str:
+    """
+    Cache key for a GET request: the url plus its query parameters in a stable order
+    """
+    if not params:
+        return url
+    return url + '?' + '&'.join(f'{name}={params[name]}' for name in sorted(params))
@@ -0,0 +1,8 @@
+"""
+REST backend: the per-endpoint collectors of the github_api package
+"""
+from github_api.popularity_data import get_popularity_data, get_popularity_data_async
+from github_api.activity_data import get_activity_data, get_activity_data_async
+from github_api.code_quality_data import get_code_quality_data, get_code_quality_data_async
+from github_api.collaboration_data import get_collaboration_data, get_collaboration_data_async
+from github_api.complete_profile_data import get_complete_profile_data, get_complete_profile_data_async
@@ -1,125 +1,128 @@
+import argparse
+import json
 import sys
 import grpc
-import concurrent.futures
+from google.protobuf.json_format import MessageToDict
 from protos import GithubGrader_pb2, GithubGrader_pb2_grpc
+from scoring import calculate_grade
+from usernames import read_usernames
 
-def fetch_activity_data(channel, username):
+def fetch_activity_data(channel, username, force_refresh=False):
     stub = GithubGrader_pb2_grpc.ActivityServiceStub(channel)
-    request = GithubGrader_pb2.ActivityRequest(username=username)
+    request = GithubGrader_pb2.ActivityRequest(username=username, force_refresh=force_refresh)
     return stub.GetActivityData(request)
 
-def fetch_popularity_data(channel, username):
+def fetch_popularity_data(channel, username, force_refresh=False):
     stub = GithubGrader_pb2_grpc.PopularityServiceStub(channel)
-    request = GithubGrader_pb2.PopularityRequest(username=username)
+    request = GithubGrader_pb2.PopularityRequest(username=username, force_refresh=force_refresh)
     return stub.GetPopularityData(request)
 
-def fetch_code_quality_data(channel, username):
+def fetch_code_quality_data(channel, username, force_refresh=False):
     stub = GithubGrader_pb2_grpc.CodeQualityServiceStub(channel)
-    request = GithubGrader_pb2.CodeQualityRequest(username=username)
+    request = GithubGrader_pb2.CodeQualityRequest(username=username, force_refresh=force_refresh)
     return stub.GetCodeQualityData(request)
 
-def fetch_collaboration_data(channel, username):
+def fetch_collaboration_data(channel, username, force_refresh=False):
     stub = GithubGrader_pb2_grpc.CollaborationServiceStub(channel)
-    request = GithubGrader_pb2.CollaborationRequest(username=username)
+    request = GithubGrader_pb2.CollaborationRequest(username=username, force_refresh=force_refresh)
     return stub.GetCollaborationData(request)
 
-def calculate_grade(activity, popularity, code_quality, collaboration):
-    total_score = 0.0
-    weights = {'activity': 0.35, 'popularity': 0.20, 'code_quality': 0.30, 'collaboration': 0.15}
-    
-    activity_score = 0.0
-    if activity.total_commits > 0:
-        commit_score = min(100, activity.total_commits / 10)
-        consistency_score = activity.consistency_score
-        recent_activity_score = min(100, activity.recent_activity_score * 3.33)
-        active_days_score = min(100, activity.active_days * 1.11)
-        activity_score = (commit_score * 0.25 + consistency_score * 0.35 + 
-                         recent_activity_score * 0.25 + active_days_score * 0.15)
-    
-    popularity_score = 0.0
-    if popularity.stars > 0 or popularity.followers > 0:
-        star_score = min(100, popularity.avg_stars * 5)
-        follower_score = min(100, popularity.followers * 0.5)
-        watcher_score = min(100, popularity.avg_watchers * 10)
-        popularity_score = (star_score * 0.5 + follower_score * 0.3 + watcher_score * 0.2)
-    
-    code_quality_score = 0.0
-    if code_quality.commit_message_quality_score > 0:
-        message_score = code_quality.commit_message_quality_score
-        language_diversity = min(100, len(code_quality.primary_languages) * 15)
-        change_size_score = 0
-        avg_changes = code_quality.avg_additions_per_commit + code_quality.avg_deletions_per_commit
-        if 10 <= avg_changes <= 200:
-            change_size_score = 100
-        elif 5 <= avg_changes <= 500:
-            change_size_score = 75
-        elif avg_changes > 0:
-            change_size_score = 50
-        code_quality_score = (message_score * 0.5 + language_diversity * 0.3 + change_size_score * 0.2)
-    
-    collaboration_score = 0.0
-    if collaboration.total_prs > 0 or collaboration.total_issues > 0:
-        pr_rate_score = collaboration.pr_merge_rate * 100
-        issue_rate_score = collaboration.issue_close_rate * 100
-        pr_activity_score = min(100, collaboration.total_prs * 5)
-        issue_activity_score = min(100, collaboration.total_issues * 5)
-        collaboration_score = (pr_rate_score * 0.3 + issue_rate_score * 0.3 + 
-                              pr_activity_score * 0.2 + issue_activity_score * 0.2)
-    
-    total_score = (activity_score * weights['activity'] + 
-                   popularity_score * weights['popularity'] + 
-                   code_quality_score * weights['code_quality'] + 
-                   collaboration_score * weights['collaboration'])
-    
-    if total_score >= 90:
-        grade = "A+"
-    elif total_score >= 85:
-        grade = "A"
-    elif total_score >= 80:
-        grade = "A-"
-    elif total_score >= 75:
-        grade = "B+"
-    elif total_score >= 70:
-        grade = "B"
-    elif total_score >= 65:
-        grade = "B-"
-    elif total_score >= 60:
-        grade = "C+"
-    elif total_score >= 55:
-        grade = "C"
-    elif total_score >= 50:
-        grade = "C-"
-    elif total_score >= 40:
-        grade = "D"
-    else:
-        grade = "F"
-    
+def fetch_complete_profile(channel, username, force_refresh=False):
+    stub = GithubGrader_pb2_grpc.ProfileServiceStub(channel)
+    request = GithubGrader_pb2.ProfileRequest(username=username,
+                                              include_popularity=True,
+                                              include_activity=True,
+                                              include_code_quality=True,
+                                              include_collaboration=True,
+                                              force_refresh=force_refresh)
+    return stub.GetCompleteProfile(request)
+
+def grade_users(channel, usernames, force_refresh=False):
+    """
+    Streams usernames to the GradeUsers RPC and yields each ProfileReply as
+    the server completes it, which is not necessarily the input order
+    """
+    stub = GithubGrader_pb2_grpc.ProfileServiceStub(channel)
+    requests = (GithubGrader_pb2.ProfileRequest(username=username,
+                                                include_popularity=True,
+                                                include_activity=True,
+                                                include_code_quality=True,
+                                                include_collaboration=True,
+                                                force_refresh=force_refresh)
+                for username in usernames)
+    return stub.GradeUsers(requests)
+
+def get_grade(profile):
+    """
+    Returns the score the server filled in, computing it locally when the
+    server predates server-side grading
+    """
+    if not profile.grade:
+        return calculate_grade(profile.activity, profile.popularity, profile.code_quality, profile.collaboration)
     return {
-        'total_score': round(total_score, 2),
-        'grade': grade,
+        'total_score': round(profile.overall_score, 2),
+        'grade': profile.grade,
         'breakdown': {
-            'activity': round(activity_score, 2),
-            'popularity': round(popularity_score, 2),
-            'code_quality': round(code_quality_score, 2),
-            'collaboration': round(collaboration_score, 2)
+            'activity': round(profile.breakdown.activity, 2),
+            'popularity': round(profile.breakdown.popularity, 2),
+            'code_quality': round(profile.breakdown.code_quality, 2),
+            'collaboration': round(profile.breakdown.collaboration, 2)
         }
     }
 
+def build_report(profile):
+    """
+    JSON-ready report for a ProfileReply: its metrics plus the grade
+    """
+    if profile.error:
+        return {'username': profile.username, 'error': profile.error}
+    report = MessageToDict(profile, preserving_proto_field_name=True, always_print_fields_with_no_presence=True)
+    for field in ('error', 'overall_score', 'grade', 'breakdown'):
+        report.pop(field, None)
+    report.update(get_grade(profile))
+    return report
+
+def run_batch(channel, source, output, force_refresh=False):
+    """
+    Grades every username in source and writes one JSON report per line to output
+    """
+    with (sys.stdin if source == '-' else open(source)) as usernames:
+        for profile in grade_users(channel, read_usernames(usernames), force_refresh):
+            output.write(json.dumps(build_report(profile)) + '\n')
+            output.flush()
+
 def main():
-    channel = grpc.insecure_channel('localhost:5005')
-    username = sys.argv[-1]
-    
+    parser = argparse.ArgumentParser(description="Grade Github accounts")
+    parser.add_argument('username', nargs='?', help="account to grade")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="grade the usernames in FILE (one per line, - for stdin) and write JSON lines")
+    parser.add_argument('--output', metavar='FILE', help="JSON lines destination for --batch, defaults to stdout")
+    parser.add_argument('--server', default='localhost:5005')
+    parser.add_argument('--refresh', action='store_true', help="bypass the server's cached results and reports")
+    args = parser.parse_args()
+    if not args.username and not args.batch:
+        parser.error("a username or --batch is required")
+
+    channel = grpc.insecure_channel(args.server)
+    if args.batch:
+        output = open(args.output, 'w') if args.output else sys.stdout
+        try:
+            run_batch(channel, args.batch, output, args.refresh)
+        except grpc.RpcError as e:
+            print(f"RPC failed: {e}", file=sys.stderr)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+            channel.close()
+        return
+
+    username = args.username
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            future_activity = executor.submit(fetch_activity_data, channel, username)
-            future_popularity = executor.submit(fetch_popularity_data, channel, username)
-            future_code_quality = executor.submit(fetch_code_quality_data, channel, username)
-            future_collaboration = executor.submit(fetch_collaboration_data, channel, username)
-            
-            activity_response = future_activity.result()
-            popularity_response = future_popularity.result()
-            code_quality_response = future_code_quality.result()
-            collaboration_response = future_collaboration.result()
+        profile_response = fetch_complete_profile(channel, username, args.refresh)
+        activity_response = profile_response.activity
+        popularity_response = profile_response.popularity
+        code_quality_response = profile_response.code_quality
+        collaboration_response = profile_response.collaboration
         
         print(f"\n{'='*60}")
         print(f"GitHub Profile Analysis for: {username}")
@@ -145,8 +148,7 @@ def main():
         print(f"  Pull Requests: {collaboration_response.total_prs} (Merge Rate: {collaboration_response.pr_merge_rate:.1%})")
         print(f"  Issues: {collaboration_response.total_issues} (Close Rate: {collaboration_response.issue_close_rate:.1%})\n")
         
-        result = calculate_grade(activity_response, popularity_response, 
-                               code_quality_response, collaboration_response)
+        result = get_grade(profile_response)
         
         print(f"{'='*60}")
         print(f"FINAL GRADE: {result['grade']} ({result['total_score']:.1f}/100)")
@@ -0,0 +1,200 @@
+"""
+Background refresher that keeps the caches warm for a watchlist of accounts
+known to be graded soon (interview pipelines, team rosters)
+
+Every pass re-reads the watchlist and probes each account's most recently
+pushed repository with one request. Accounts never warmed come first, then
+the ones that pushed since they were last warmed (most recent push first),
+then the ones whose warm data is getting old. An account is skipped for the
+pass when warming it would dig into the share of the core quota kept for
+interactive requests, so warming runs in the quota left over by quiet periods.
+Accounts too large to ever fit in the pre-warming share are left to be crawled
+on demand
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+import collector
+import scoring
+from github_api import http_client, rate_limit
+from github_api.profile_data import get_last_page
+from usernames import read_usernames
+
+# File of usernames to keep warm, one per line; unset disables pre-warming
+WATCHLIST_PATH = os.getenv("GRADER_WATCHLIST")
+# Seconds between scheduling passes
+PREWARM_INTERVAL = float(os.getenv("GRADER_PREWARM_INTERVAL", 60))
+# An account that did not push is warmed again after this, before its report expires
+PREWARM_MAX_AGE = float(os.getenv("GRADER_PREWARM_MAX_AGE", scoring.REPORT_TTL * 0.8))
+# Share of the core quota pre-warming may use; the rest is kept for interactive requests
+PREWARM_BUDGET_SHARE = float(os.getenv("GRADER_PREWARM_BUDGET_SHARE", 0.5))
+
+class _UserState:
+    __slots__ = ('warmed_at', 'pushed_at', 'repo_count', 'too_large')
+
+    def __init__(self):
+        self.warmed_at = None
+        # Latest pushed_at of the account's repositories when it was last warmed
+        self.pushed_at = None
+        self.repo_count = None
+        # Set once the account was reported as too large to pre-warm
+        self.too_large = False
+
+def probe_user(user: str) -> Optional[Tuple[str, int]]:
+    """
+    Returns the latest pushed_at among the user's repositories and their
+    number, from a one-repository page of the listing sorted by push date
+    Returns None when the listing could not be fetched
+    """
+    try:
+        response = http_client.get(f'/users/{user}/repos', params={'sort': 'pushed', 'per_page': 1})
+        if response.status_code != 200:
+            print(f"Error probing {user}: {response.status_code}")
+            return None
+        repos = response.json()
+        pushed_at = (repos[0].get('pushed_at') or '') if repos else ''
+        return pushed_at, get_last_page(response) or len(repos)
+    except Exception as e:
+        print(f"Error probing {user}: {str(e)}")
+        return None
+
+def estimate_cost(repo_count: Optional[int]) -> int:
+    """
+    Rough number of core requests a full crawl takes: the repository listing
+    plus commits, languages and issues of every repository
+    """
+    repo_count = repo_count or 0
+    return 1 + -(-repo_count // 100) + 3 * repo_count
+
+def get_push_time(pushed_at: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(pushed_at.replace('Z', '+00:00')).timestamp()
+    except (ValueError, TypeError, AttributeError):
+        return 0.0
+
+class Prewarmer:
+    """
+    Warms the accounts of a watchlist file on a background thread
+    """
+    def __init__(self, path: str, backend, interval: float = PREWARM_INTERVAL, max_age: float = PREWARM_MAX_AGE,
+                 budget_share: float = PREWARM_BUDGET_SHARE):
+        self.path = path
+        self.backend = backend
+        self.interval = interval
+        self.max_age = max_age
+        self.budget_share = budget_share
+        self.states = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load_watchlist(self) -> List[str]:
+        try:
+            with open(self.path) as watchlist:
+                return list(dict.fromkeys(read_usernames(watchlist)))
+        except OSError as e:
+            print(f"Error reading watchlist {self.path}: {str(e)}")
+            return []
+
+    def has_budget(self, cost: int) -> bool:
+        """
+        True when cost more core requests leave the interactive share of the quota untouched
+        """
+        budget = rate_limit.get_remaining_budget('core')
+        if not budget:
+            # Nothing was sent yet, so the quota is whole
+            return True
+        reserve = budget['limit'] * (1 - self.budget_share)
+        return budget['remaining'] - cost >= reserve
+
+    def can_ever_fit(self, cost: int) -> bool:
+        """
+        False when cost exceeds the whole pre-warming share of a full quota
+        """
+        budget = rate_limit.get_remaining_budget('core')
+        return not budget or cost <= budget['limit'] * self.budget_share
+
+    def get_due_users(self, usernames: List[str]) -> List[Tuple[str, str]]:
+        """
+        Probes the watchlist and returns (user, pushed_at) for the accounts to
+        warm, most urgent first
+        """
+        now = time.monotonic()
+        due = []
+        for user in usernames:
+            state = self.states.setdefault(user, _UserState())
+            if self._stop.is_set() or not self.has_budget(1):
+                break
+            probe = probe_user(user)
+            if probe is None:
+                continue
+            pushed_at, state.repo_count = probe
+            if state.warmed_at is None:
+                rank = 0
+            elif pushed_at != state.pushed_at:
+                rank = 1
+            elif now - state.warmed_at > self.max_age:
+                rank = 2
+            else:
+                continue
+            due.append(((rank, -get_push_time(pushed_at), state.warmed_at or 0), user, pushed_at))
+        due.sort(key=lambda item: item[0])
+        return [(user, pushed_at) for _, user, pushed_at in due]
+
+    def run_once(self) -> int:
+        """
+        Runs one scheduling pass
+        Returns the number of accounts warmed
+        """
+        usernames = self.load_watchlist()
+        for user in set(self.states) - set(usernames):
+            del self.states[user]
+
+        warmed = 0
+        for user, pushed_at in self.get_due_users(usernames):
+            state = self.states[user]
+            if self._stop.is_set():
+                break
+            cost = estimate_cost(state.repo_count)
+            if not self.can_ever_fit(cost):
+                if not state.too_large:
+                    print(f"Not pre-warming {user}: {state.repo_count} repositories cost about {cost} requests, "
+                          f"more than the pre-warming share of the quota")
+                    state.too_large = True
+                continue
+            state.too_large = False
+            if not self.has_budget(cost):
+                continue
+            try:
+                collector.warm_user(self.backend, user)
+            except Exception as e:
+                print(f"Error warming {user}: {str(e)}")
+                continue
+            state.warmed_at = time.monotonic()
+            state.pushed_at = pushed_at
+            warmed += 1
+        return warmed
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in pre-warming pass: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='prewarm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def start(path: str, backend) -> Prewarmer:
+    """
+    Starts warming the accounts listed in path in the background
+    """
+    print(f"Pre-warming the accounts in {path}")
+    return Prewarmer(path, backend).start()
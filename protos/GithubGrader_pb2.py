@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12GithubGrader.proto\x12\rgithub_grader\"%\n\x11PopularityRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"#\n\x0f\x41\x63tivityRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"&\n\x12\x43odeQualityRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"(\n\x14\x43ollaborationRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"\x95\x01\n\x0eProfileRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x1a\n\x12include_popularity\x18\x02 \x01(\x08\x12\x18\n\x10include_activity\x18\x03 \x01(\x08\x12\x1c\n\x14include_code_quality\x18\x04 \x01(\x08\x12\x1d\n\x15include_collaboration\x18\x05 \x01(\x08\"\x81\x01\n\x0fPopularityReply\x12\r\n\x05stars\x18\x01 \x01(\x05\x12\x11\n\tavg_stars\x18\x02 \x01(\x02\x12\x10\n\x08watchers\x18\x03 \x01(\x05\x12\x14\n\x0c\x61vg_watchers\x18\x04 \x01(\x02\x12\x11\n\tfollowers\x18\x05 \x01(\x05\x12\x11\n\tfollowing\x18\x06 \x01(\x05\"\x93\x01\n\rActivityReply\x12\x15\n\rtotal_commits\x18\x01 \x01(\x05\x12\x1c\n\x14\x61vg_commits_per_repo\x18\x02 \x01(\x02\x12\x1d\n\x15recent_activity_score\x18\x03 \x01(\x05\x12\x19\n\x11\x63onsistency_score\x18\x04 \x01(\x02\x12\x13\n\x0b\x61\x63tive_days\x18\x05 \x01(\x05\"\x87\x02\n\x10\x43odeQualityReply\x12P\n\x11primary_languages\x18\x01 \x03(\x0b\x32\x35.github_grader.CodeQualityReply.PrimaryLanguagesEntry\x12$\n\x1c\x63ommit_message_quality_score\x18\x02 \x01(\x02\x12 \n\x18\x61vg_additions_per_commit\x18\x03 \x01(\x02\x12 \n\x18\x61vg_deletions_per_commit\x18\x04 \x01(\x02\x1a\x37\n\x15PrimaryLanguagesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"\xae\x01\n\x12\x43ollaborationReply\x12\x11\n\ttotal_prs\x18\x01 \x01(\x05\x12\x12\n\nmerged_prs\x18\x02 \x01(\x05\x12\x15\n\rpr_merge_rate\x18\x03 \x01(\x02\x12\x14\n\x0ctotal_issues\x18\x04 \x01(\x05\x12\x15\n\rclosed_issues\x18\x05 \x01(\x05\x12\x18\n\x10issue_close_rate\x18\x06 \x01(\x02\x12\x13\n\x0b\x61vg_pr_size\x18\x07 \x01(\x02\"\xb1\x02\n\x0cProfileReply\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x14\n\x0crepositories\x18\x02 \x03(\t\x12\x32\n\npopularity\x18\x03 \x01(\x0b\x32\x1e.github_grader.PopularityReply\x12.\n\x08\x61\x63tivity\x18\x04 \x01(\x0b\x32\x1c.github_grader.ActivityReply\x12\x35\n\x0c\x63ode_quality\x18\x05 \x01(\x0b\x32\x1f.github_grader.CodeQualityReply\x12\x38\n\rcollaboration\x18\x06 \x01(\x0b\x32!.github_grader.CollaborationReply\x12\x15\n\roverall_score\x18\x07 \x01(\x02\x12\r\n\x05grade\x18\x08 \x01(\t\"?\n\rErrorResponse\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07\x64\x65tails\x18\x03 \x01(\t2j\n\x11PopularityService\x12U\n\x11GetPopularityData\x12 .github_grader.PopularityRequest\x1a\x1e.github_grader.PopularityReply2b\n\x0f\x41\x63tivityService\x12O\n\x0fGetActivityData\x12\x1e.github_grader.ActivityRequest\x1a\x1c.github_grader.ActivityReply2n\n\x12\x43odeQualityService\x12X\n\x12GetCodeQualityData\x12!.github_grader.CodeQualityRequest\x1a\x1f.github_grader.CodeQualityReply2v\n\x14\x43ollaborationService\x12^\n\x14GetCollaborationData\x12#.github_grader.CollaborationRequest\x1a!.github_grader.CollaborationReply2b\n\x0eProfileService\x12P\n\x12GetCompleteProfile\x12\x1d.github_grader.ProfileRequest\x1a\x1b.github_grader.ProfileReplyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12GithubGrader.proto\x12\rgithub_grader\"<\n\x11PopularityRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x15\n\rforce_refresh\x18\x02 \x01(\x08\":\n\x0f\x41\x63tivityRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x15\n\rforce_refresh\x18\x02 \x01(\x08\"=\n\x12\x43odeQualityRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x15\n\rforce_refresh\x18\x02 \x01(\x08\"?\n\x14\x43ollaborationRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x15\n\rforce_refresh\x18\x02 \x01(\x08\"\xac\x01\n\x0eProfileRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x1a\n\x12include_popularity\x18\x02 \x01(\x08\x12\x18\n\x10include_activity\x18\x03 \x01(\x08\x12\x1c\n\x14include_code_quality\x18\x04 \x01(\x08\x12\x1d\n\x15include_collaboration\x18\x05 \x01(\x08\x12\x15\n\rforce_refresh\x18\x06 \x01(\x08\"\x81\x01\n\x0fPopularityReply\x12\r\n\x05stars\x18\x01 \x01(\x05\x12\x11\n\tavg_stars\x18\x02 \x01(\x02\x12\x10\n\x08watchers\x18\x03 \x01(\x05\x12\x14\n\x0c\x61vg_watchers\x18\x04 \x01(\x02\x12\x11\n\tfollowers\x18\x05 \x01(\x05\x12\x11\n\tfollowing\x18\x06 \x01(\x05\"\x93\x01\n\rActivityReply\x12\x15\n\rtotal_commits\x18\x01 \x01(\x05\x12\x1c\n\x14\x61vg_commits_per_repo\x18\x02 \x01(\x02\x12\x1d\n\x15recent_activity_score\x18\x03 \x01(\x05\x12\x19\n\x11\x63onsistency_score\x18\x04 \x01(\x02\x12\x13\n\x0b\x61\x63tive_days\x18\x05 \x01(\x05\"\x87\x02\n\x10\x43odeQualityReply\x12P\n\x11primary_languages\x18\x01 \x03(\x0b\x32\x35.github_grader.CodeQualityReply.PrimaryLanguagesEntry\x12$\n\x1c\x63ommit_message_quality_score\x18\x02 \x01(\x02\x12 \n\x18\x61vg_additions_per_commit\x18\x03 \x01(\x02\x12 \n\x18\x61vg_deletions_per_commit\x18\x04 \x01(\x02\x1a\x37\n\x15PrimaryLanguagesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"\xae\x01\n\x12\x43ollaborationReply\x12\x11\n\ttotal_prs\x18\x01 \x01(\x05\x12\x12\n\nmerged_prs\x18\x02 \x01(\x05\x12\x15\n\rpr_merge_rate\x18\x03 \x01(\x02\x12\x14\n\x0ctotal_issues\x18\x04 \x01(\x05\x12\x15\n\rclosed_issues\x18\x05 \x01(\x05\x12\x18\n\x10issue_close_rate\x18\x06 \x01(\x02\x12\x13\n\x0b\x61vg_pr_size\x18\x07 \x01(\x02\"\xf2\x02\n\x0cProfileReply\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x14\n\x0crepositories\x18\x02 \x03(\t\x12\x32\n\npopularity\x18\x03 \x01(\x0b\x32\x1e.github_grader.PopularityReply\x12.\n\x08\x61\x63tivity\x18\x04 \x01(\x0b\x32\x1c.github_grader.ActivityReply\x12\x35\n\x0c\x63ode_quality\x18\x05 \x01(\x0b\x32\x1f.github_grader.CodeQualityReply\x12\x38\n\rcollaboration\x18\x06 \x01(\x0b\x32!.github_grader.CollaborationReply\x12\x15\n\roverall_score\x18\x07 \x01(\x02\x12\r\n\x05grade\x18\x08 \x01(\t\x12\r\n\x05\x65rror\x18\t \x01(\t\x12\x30\n\tbreakdown\x18\n \x01(\x0b\x32\x1d.github_grader.ScoreBreakdown\"c\n\x0eScoreBreakdown\x12\x10\n\x08\x61\x63tivity\x18\x01 \x01(\x02\x12\x12\n\npopularity\x18\x02 \x01(\x02\x12\x14\n\x0c\x63ode_quality\x18\x03 \x01(\x02\x12\x15\n\rcollaboration\x18\x04 \x01(\x02\"?\n\rErrorResponse\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07\x64\x65tails\x18\x03 \x01(\t2j\n\x11PopularityService\x12U\n\x11GetPopularityData\x12 .github_grader.PopularityRequest\x1a\x1e.github_grader.PopularityReply2b\n\x0f\x41\x63tivityService\x12O\n\x0fGetActivityData\x12\x1e.github_grader.ActivityRequest\x1a\x1c.github_grader.ActivityReply2n\n\x12\x43odeQualityService\x12X\n\x12GetCodeQualityData\x12!.github_grader.CodeQualityRequest\x1a\x1f.github_grader.CodeQualityReply2v\n\x14\x43ollaborationService\x12^\n\x14GetCollaborationData\x12#.github_grader.CollaborationRequest\x1a!.github_grader.CollaborationReply2\xb0\x01\n\x0eProfileService\x12P\n\x12GetCompleteProfile\x12\x1d.github_grader.ProfileRequest\x1a\x1b.github_grader.ProfileReply\x12L\n\nGradeUsers\x12\x1d.github_grader.ProfileRequest\x1a\x1b.github_grader.ProfileReply(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -34,37 +34,39 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_CODEQUALITYREPLY_PRIMARYLANGUAGESENTRY']._loaded_options = None
   _globals['_CODEQUALITYREPLY_PRIMARYLANGUAGESENTRY']._serialized_options = b'8\001'
   _globals['_POPULARITYREQUEST']._serialized_start=37
-  _globals['_POPULARITYREQUEST']._serialized_end=74
-  _globals['_ACTIVITYREQUEST']._serialized_start=76
-  _globals['_ACTIVITYREQUEST']._serialized_end=111
-  _globals['_CODEQUALITYREQUEST']._serialized_start=113
-  _globals['_CODEQUALITYREQUEST']._serialized_end=151
-  _globals['_COLLABORATIONREQUEST']._serialized_start=153
-  _globals['_COLLABORATIONREQUEST']._serialized_end=193
-  _globals['_PROFILEREQUEST']._serialized_start=196
-  _globals['_PROFILEREQUEST']._serialized_end=345
-  _globals['_POPULARITYREPLY']._serialized_start=348
-  _globals['_POPULARITYREPLY']._serialized_end=477
-  _globals['_ACTIVITYREPLY']._serialized_start=480
-  _globals['_ACTIVITYREPLY']._serialized_end=627
-  _globals['_CODEQUALITYREPLY']._serialized_start=630
-  _globals['_CODEQUALITYREPLY']._serialized_end=893
-  _globals['_CODEQUALITYREPLY_PRIMARYLANGUAGESENTRY']._serialized_start=838
-  _globals['_CODEQUALITYREPLY_PRIMARYLANGUAGESENTRY']._serialized_end=893
-  _globals['_COLLABORATIONREPLY']._serialized_start=896
-  _globals['_COLLABORATIONREPLY']._serialized_end=1070
-  _globals['_PROFILEREPLY']._serialized_start=1073
-  _globals['_PROFILEREPLY']._serialized_end=1378
-  _globals['_ERRORRESPONSE']._serialized_start=1380
-  _globals['_ERRORRESPONSE']._serialized_end=1443
-  _globals['_POPULARITYSERVICE']._serialized_start=1445
-  _globals['_POPULARITYSERVICE']._serialized_end=1551
-  _globals['_ACTIVITYSERVICE']._serialized_start=1553
-  _globals['_ACTIVITYSERVICE']._serialized_end=1651
-  _globals['_CODEQUALITYSERVICE']._serialized_start=1653
-  _globals['_CODEQUALITYSERVICE']._serialized_end=1763
-  _globals['_COLLABORATIONSERVICE']._serialized_start=1765
-  _globals['_COLLABORATIONSERVICE']._serialized_end=1883
-  _globals['_PROFILESERVICE']._serialized_start=1885
-  _globals['_PROFILESERVICE']._serialized_end=1983
+  _globals['_POPULARITYREQUEST']._serialized_end=97
+  _globals['_ACTIVITYREQUEST']._serialized_start=99
+  _globals['_ACTIVITYREQUEST']._serialized_end=157
+  _globals['_CODEQUALITYREQUEST']._serialized_start=159
+  _globals['_CODEQUALITYREQUEST']._serialized_end=220
+  _globals['_COLLABORATIONREQUEST']._serialized_start=222
+  _globals['_COLLABORATIONREQUEST']._serialized_end=285
+  _globals['_PROFILEREQUEST']._serialized_start=288
+  _globals['_PROFILEREQUEST']._serialized_end=460
+  _globals['_POPULARITYREPLY']._serialized_start=463
+  _globals['_POPULARITYREPLY']._serialized_end=592
+  _globals['_ACTIVITYREPLY']._serialized_start=595
+  _globals['_ACTIVITYREPLY']._serialized_end=742
+  _globals['_CODEQUALITYREPLY']._serialized_start=745
+  _globals['_CODEQUALITYREPLY']._serialized_end=1008
+  _globals['_CODEQUALITYREPLY_PRIMARYLANGUAGESENTRY']._serialized_start=953
+  _globals['_CODEQUALITYREPLY_PRIMARYLANGUAGESENTRY']._serialized_end=1008
+  _globals['_COLLABORATIONREPLY']._serialized_start=1011
+  _globals['_COLLABORATIONREPLY']._serialized_end=1185
+  _globals['_PROFILEREPLY']._serialized_start=1188
+  _globals['_PROFILEREPLY']._serialized_end=1558
+  _globals['_SCOREBREAKDOWN']._serialized_start=1560
+  _globals['_SCOREBREAKDOWN']._serialized_end=1659
+  _globals['_ERRORRESPONSE']._serialized_start=1661
+  _globals['_ERRORRESPONSE']._serialized_end=1724
+  _globals['_POPULARITYSERVICE']._serialized_start=1726
+  _globals['_POPULARITYSERVICE']._serialized_end=1832
+  _globals['_ACTIVITYSERVICE']._serialized_start=1834
+  _globals['_ACTIVITYSERVICE']._serialized_end=1932
+  _globals['_CODEQUALITYSERVICE']._serialized_start=1934
+  _globals['_CODEQUALITYSERVICE']._serialized_end=2044
+  _globals['_COLLABORATIONSERVICE']._serialized_start=2046
+  _globals['_COLLABORATIONSERVICE']._serialized_end=2164
+  _globals['_PROFILESERVICE']._serialized_start=2167
+  _globals['_PROFILESERVICE']._serialized_end=2343
 # @@protoc_insertion_point(module_scope)
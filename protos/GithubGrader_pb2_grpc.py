@@ -327,6 +327,11 @@ class ProfileServiceStub(object):
                 request_serializer=GithubGrader__pb2.ProfileRequest.SerializeToString,
                 response_deserializer=GithubGrader__pb2.ProfileReply.FromString,
                 _registered_method=True)
+        self.GradeUsers = channel.stream_stream(
+                '/github_grader.ProfileService/GradeUsers',
+                request_serializer=GithubGrader__pb2.ProfileRequest.SerializeToString,
+                response_deserializer=GithubGrader__pb2.ProfileReply.FromString,
+                _registered_method=True)
 
 
 class ProfileServiceServicer(object):
@@ -338,6 +343,13 @@ class ProfileServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GradeUsers(self, request_iterator, context):
+        """Grades a stream of users, replying to each as soon as it completes
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ProfileServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -346,6 +358,11 @@ def add_ProfileServiceServicer_to_server(servicer, server):
                     request_deserializer=GithubGrader__pb2.ProfileRequest.FromString,
                     response_serializer=GithubGrader__pb2.ProfileReply.SerializeToString,
             ),
+            'GradeUsers': grpc.stream_stream_rpc_method_handler(
+                    servicer.GradeUsers,
+                    request_deserializer=GithubGrader__pb2.ProfileRequest.FromString,
+                    response_serializer=GithubGrader__pb2.ProfileReply.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'github_grader.ProfileService', rpc_method_handlers)
@@ -383,3 +400,30 @@ class ProfileService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GradeUsers(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/github_grader.ProfileService/GradeUsers',
+            GithubGrader__pb2.ProfileRequest.SerializeToString,
+            GithubGrader__pb2.ProfileReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,85 @@
+"""
+Cache of collected metric families (popularity, activity, ...) per user
+
+Each family has its own TTL, since followers and stars change far more slowly
+than commit activity. A result past its TTL but within STALE_GRACE is still
+served at once while the caller refreshes it in the background; an older one
+is collected again before answering
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+FAMILY_TTLS = {
+    'popularity': float(os.getenv("GRADER_POPULARITY_TTL", 6 * 3600)),
+    'activity': float(os.getenv("GRADER_ACTIVITY_TTL", 300)),
+    'code_quality': float(os.getenv("GRADER_CODE_QUALITY_TTL", 3600)),
+    'collaboration': float(os.getenv("GRADER_COLLABORATION_TTL", 1800)),
+}
+# How long past its TTL a result may still be served while it is refreshed
+STALE_GRACE = float(os.getenv("GRADER_STALE_GRACE", 3600))
+RESULT_CACHE_SIZE = int(os.getenv("GRADER_RESULT_CACHE_SIZE", 8192))
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+class ResultCache:
+    """
+    LRU cache of results keyed by (family, user) with a TTL per family
+    """
+    def __init__(self, ttls: dict = None, grace: float = STALE_GRACE, max_size: int = RESULT_CACHE_SIZE):
+        self.ttls = dict(FAMILY_TTLS if ttls is None else ttls)
+        self.grace = grace
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+
+    def get(self, family: str, user: str):
+        """
+        Returns (result, FRESH or STALE), or (None, None) when there is no
+        result that may be served
+        """
+        key = (family, user)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            result, stored_at = entry
+            age = time.monotonic() - stored_at
+            ttl = self.ttls.get(family, 0)
+            if age > ttl + self.grace:
+                del self._entries[key]
+                return None, None
+            self._entries.move_to_end(key)
+            return result, FRESH if age <= ttl else STALE
+
+    def put(self, family: str, user: str, result):
+        key = (family, user)
+        with self._lock:
+            self._entries[key] = (result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def start_refresh(self, family: str, user: str) -> bool:
+        """
+        Claims the background refresh of a stale result
+        Returns False when another caller is already refreshing it
+        """
+        with self._lock:
+            if (family, user) in self._refreshing:
+                return False
+            self._refreshing.add((family, user))
+            return True
+
+    def end_refresh(self, family: str, user: str):
+        with self._lock:
+            self._refreshing.discard((family, user))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+cache = ResultCache()
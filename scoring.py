@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Bump whenever calculate_grade changes so memoized reports are recomputed
+SCORING_VERSION = 1
+# How long a user's collected data is trusted before it is crawled again
+REPORT_TTL = int(os.getenv("GRADER_REPORT_TTL", 600))
+REPORT_CACHE_SIZE = int(os.getenv("GRADER_REPORT_CACHE_SIZE", 4096))
+# SQLite file shared by server worker processes; unset keeps reports in memory
+REPORT_STORE_PATH = os.getenv("GRADER_REPORT_STORE")
+
+WEIGHTS = {'activity': 0.35, 'popularity': 0.20, 'code_quality': 0.30, 'collaboration': 0.15}
+# Lowest total score for each letter grade, best first; anything lower is an F
+GRADE_THRESHOLDS = [(90, "A+"), (85, "A"), (80, "A-"), (75, "B+"), (70, "B"), (65, "B-"),
+                    (60, "C+"), (55, "C"), (50, "C-"), (40, "D")]
+
+def get_letter_grade(total_score: float) -> str:
+    for threshold, grade in GRADE_THRESHOLDS:
+        if total_score >= threshold:
+            return grade
+    return "F"
+
+def calculate_grade(activity, popularity, code_quality, collaboration):
+    total_score = 0.0
+    weights = WEIGHTS
+    
+    activity_score = 0.0
+    if activity.total_commits > 0:
+        commit_score = min(100, activity.total_commits / 10)
+        consistency_score = activity.consistency_score
+        recent_activity_score = min(100, activity.recent_activity_score * 3.33)
+        active_days_score = min(100, activity.active_days * 1.11)
+        activity_score = (commit_score * 0.25 + consistency_score * 0.35 + 
+                         recent_activity_score * 0.25 + active_days_score * 0.15)
+    
+    popularity_score = 0.0
+    if popularity.stars > 0 or popularity.followers > 0:
+        star_score = min(100, popularity.avg_stars * 5)
+        follower_score = min(100, popularity.followers * 0.5)
+        watcher_score = min(100, popularity.avg_watchers * 10)
+        popularity_score = (star_score * 0.5 + follower_score * 0.3 + watcher_score * 0.2)
+    
+    code_quality_score = 0.0
+    if code_quality.commit_message_quality_score > 0:
+        message_score = code_quality.commit_message_quality_score
+        language_diversity = min(100, len(code_quality.primary_languages) * 15)
+        change_size_score = 0
+        avg_changes = code_quality.avg_additions_per_commit + code_quality.avg_deletions_per_commit
+        if 10 <= avg_changes <= 200:
+            change_size_score = 100
+        elif 5 <= avg_changes <= 500:
+            change_size_score = 75
+        elif avg_changes > 0:
+            change_size_score = 50
+        code_quality_score = (message_score * 0.5 + language_diversity * 0.3 + change_size_score * 0.2)
+    
+    collaboration_score = 0.0
+    if collaboration.total_prs > 0 or collaboration.total_issues > 0:
+        pr_rate_score = collaboration.pr_merge_rate * 100
+        issue_rate_score = collaboration.issue_close_rate * 100
+        pr_activity_score = min(100, collaboration.total_prs * 5)
+        issue_activity_score = min(100, collaboration.total_issues * 5)
+        collaboration_score = (pr_rate_score * 0.3 + issue_rate_score * 0.3 + 
+                              pr_activity_score * 0.2 + issue_activity_score * 0.2)
+    
+    total_score = (activity_score * weights['activity'] + 
+                   popularity_score * weights['popularity'] + 
+                   code_quality_score * weights['code_quality'] + 
+                   collaboration_score * weights['collaboration'])
+    
+    grade = get_letter_grade(total_score)
+    
+    return {
+        'total_score': round(total_score, 2),
+        'grade': grade,
+        'breakdown': {
+            'activity': round(activity_score, 2),
+            'popularity': round(popularity_score, 2),
+            'code_quality': round(code_quality_score, 2),
+            'collaboration': round(collaboration_score, 2)
+        }
+    }
+
+def get_data_version(profile: dict) -> str:
+    """
+    Fingerprint of the collected metrics; equal data gives an equal version
+    """
+    return hashlib.sha1(json.dumps(profile, sort_keys=True).encode()).hexdigest()
+
+class ReportCache:
+    """
+    Memoizes graded reports per (user, data version, scoring version)
+    A user's data version is trusted for ttl seconds, so repeat lookups in that
+    window are answered from memory; after it the data is collected again and
+    the report is only rescored when the data or SCORING_VERSION changed
+    """
+    def __init__(self, ttl: float = REPORT_TTL, max_size: int = REPORT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data_versions = {}
+        self._reports = OrderedDict()
+
+    def get(self, user: str):
+        """
+        Returns the memoized report for user, or None when it has to be recomputed
+        """
+        with self._lock:
+            entry = self._data_versions.get(user)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                return None
+            key = (user, entry[0], SCORING_VERSION)
+            report = self._reports.get(key)
+            if report is not None:
+                self._reports.move_to_end(key)
+            return report
+
+    def get_or_score(self, user: str, profile: dict, score):
+        """
+        Returns the report for freshly collected profile data, calling score()
+        only when no report exists for this data version and SCORING_VERSION
+        """
+        data_version = get_data_version(profile)
+        key = (user, data_version, SCORING_VERSION)
+        with self._lock:
+            self._data_versions[user] = (data_version, time.monotonic())
+            report = self._reports.get(key)
+        if report is None:
+            report = score()
+        with self._lock:
+            self._reports[key] = report
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.max_size:
+                (evicted_user, evicted_version, _), _ = self._reports.popitem(last=False)
+                if self._data_versions.get(evicted_user, (None,))[0] == evicted_version:
+                    del self._data_versions[evicted_user]
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._data_versions.clear()
+            self._reports.clear()
+
+class SharedReportCache:
+    """
+    ReportCache backed by a SQLite database in WAL mode, so every server worker
+    process sees the reports the others computed and a user graded by one
+    worker is not crawled again by another within ttl
+    Reports are stored serialized; parse turns the stored bytes back into a report
+    """
+    def __init__(self, path: str, parse, ttl: float = REPORT_TTL, max_size: int = REPORT_CACHE_SIZE):
+        self.path = path
+        self.parse = parse
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                user TEXT PRIMARY KEY,
+                data_version TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            )''')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS reports (
+                user TEXT NOT NULL,
+                data_version TEXT NOT NULL,
+                scoring_version INTEGER NOT NULL,
+                report BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (user, data_version, scoring_version)
+            )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS reports_last_access ON reports (last_access)')
+
+    def get(self, user: str):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data_version, checked_at FROM data_versions WHERE user = ?', (user,)).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                return None
+            key = (user, row[0], SCORING_VERSION)
+            report = self._db.execute(
+                'SELECT report FROM reports WHERE user = ? AND data_version = ? AND scoring_version = ?', key).fetchone()
+            if report is None:
+                return None
+            self._db.execute(
+                'UPDATE reports SET last_access = ? WHERE user = ? AND data_version = ? AND scoring_version = ?',
+                (time.time(), *key))
+        return self.parse(report[0])
+
+    def get_or_score(self, user: str, profile: dict, score):
+        data_version = get_data_version(profile)
+        key = (user, data_version, SCORING_VERSION)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO data_versions VALUES (?, ?, ?)',
+                             (user, data_version, time.time()))
+            row = self._db.execute(
+                'SELECT report FROM reports WHERE user = ? AND data_version = ? AND scoring_version = ?', key).fetchone()
+        report = self.parse(row[0]) if row else score()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)',
+                             (*key, report.SerializeToString(), time.time()))
+            count = self._db.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+            if count > self.max_size:
+                self._db.execute('DELETE FROM reports WHERE rowid IN '
+                                 '(SELECT rowid FROM reports ORDER BY last_access LIMIT ?)', (count - self.max_size,))
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM data_versions')
+            self._db.execute('DELETE FROM reports')
+
+report_cache = ReportCache()
+
+def use_shared_store(path: str, parse):
+    """
+    Switches report memoization to the SQLite store at path, shared between processes
+    """
+    global report_cache
+    report_cache = SharedReportCache(path, parse)
@@ -1,15 +1,248 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import time
 import grpc
 from concurrent import futures
-from protos import GithubGrader_pb2_grpc
-from collector import PopularityProvider, ActivityProvider, CodeQualityProvider, CollaborationProvider
+from protos import GithubGrader_pb2, GithubGrader_pb2_grpc
+from github_api import http_client, async_client
+from collector import PopularityProvider, ActivityProvider, CodeQualityProvider, CollaborationProvider, ProfileProvider
+from collector import AsyncPopularityProvider, AsyncActivityProvider, AsyncCodeQualityProvider
+from collector import AsyncCollaborationProvider, AsyncProfileProvider
+from collector import BACKENDS, GITHUB_BACKEND, get_backend
+import prewarm
+import scoring
 
+MAX_WORKERS = 10
+# aio serves every RPC from one event loop; thread keeps the thread-per-RPC server
+SERVER_MODE = os.getenv("GRADER_SERVER_MODE", "aio")
+# Server processes started by the launcher, all bound to the same port
+SERVER_PROCESSES = int(os.getenv("GRADER_SERVER_PROCESSES", 1))
+# Seconds a stopping server lets in-flight RPCs finish
+GRACE_PERIOD = float(os.getenv("GRADER_GRACE_PERIOD", 30))
+# Seconds before restarting a worker that died before it was ready, doubled on every further failure
+RESTART_BACKOFF = float(os.getenv("GRADER_RESTART_BACKOFF", 1))
+RESTART_BACKOFF_MAX = 60
+# Startup failures in a row of one worker after which the launcher gives up
+MAX_START_FAILURES = int(os.getenv("GRADER_MAX_START_FAILURES", 5))
+DEFAULT_REPORT_STORE = ".grader_reports.sqlite3"
 
-server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-GithubGrader_pb2_grpc.add_ActivityServiceServicer_to_server(ActivityProvider(), server)  
-GithubGrader_pb2_grpc.add_PopularityServiceServicer_to_server(PopularityProvider(), server)  
-GithubGrader_pb2_grpc.add_CodeQualityServiceServicer_to_server(CodeQualityProvider(), server)
-GithubGrader_pb2_grpc.add_CollaborationServiceServicer_to_server(CollaborationProvider(), server)
+def add_servicers(server, backend, asynchronous: bool = False):
+    if asynchronous:
+        providers = (AsyncActivityProvider, AsyncPopularityProvider, AsyncCodeQualityProvider,
+                     AsyncCollaborationProvider, AsyncProfileProvider)
+    else:
+        providers = (ActivityProvider, PopularityProvider, CodeQualityProvider,
+                     CollaborationProvider, ProfileProvider)
+    activity, popularity, code_quality, collaboration, profile = providers
+    GithubGrader_pb2_grpc.add_ActivityServiceServicer_to_server(activity(backend), server)
+    GithubGrader_pb2_grpc.add_PopularityServiceServicer_to_server(popularity(backend), server)
+    GithubGrader_pb2_grpc.add_CodeQualityServiceServicer_to_server(code_quality(backend), server)
+    GithubGrader_pb2_grpc.add_CollaborationServiceServicer_to_server(collaboration(backend), server)
+    GithubGrader_pb2_grpc.add_ProfileServiceServicer_to_server(profile(backend), server)
 
-server.add_insecure_port('[::]:5005')
-server.start()
-server.wait_for_termination()
+def get_server_options(reuse_port: bool):
+    # SO_REUSEPORT lets every worker process listen on the same port
+    return [('grpc.so_reuseport', 1 if reuse_port else 0)]
+
+def use_report_store():
+    if scoring.REPORT_STORE_PATH:
+        scoring.use_shared_store(scoring.REPORT_STORE_PATH, GithubGrader_pb2.ProfileReply.FromString)
+
+def start_prewarm(watchlist, backend):
+    if watchlist:
+        prewarm.start(watchlist, backend)
+
+def serve(backend_name: str = GITHUB_BACKEND, port: int = 5005, reuse_port: bool = False, ready=None,
+          watchlist: str = None):
+    backend = get_backend(backend_name)
+    use_report_store()
+
+    # One pooled keep-alive connection per concurrent Github request
+    http_client.configure_pool(pool_maxsize=max(MAX_WORKERS, async_client.GLOBAL_CONCURRENCY, http_client.POOL_MAXSIZE))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS), options=get_server_options(reuse_port))
+    add_servicers(server, backend)
+
+    server.add_insecure_port(f'[::]:{port}')
+    server.start()
+    # SIGTERM drains in-flight RPCs before the process exits
+    signal.signal(signal.SIGTERM, lambda *_: server.stop(GRACE_PERIOD))
+    start_prewarm(watchlist, backend)
+    if ready is not None:
+        ready.set()
+    server.wait_for_termination()
+
+async def serve_aio(backend_name: str = GITHUB_BACKEND, port: int = 5005, reuse_port: bool = False, ready=None,
+                    watchlist: str = None):
+    """
+    Serves every RPC as a coroutine, so in-flight gradings are bounded by the
+    Github request limits in async_client rather than by server threads
+    """
+    backend = get_backend(backend_name)
+    use_report_store()
+
+    http_client.configure_pool(pool_maxsize=max(async_client.GLOBAL_CONCURRENCY, http_client.POOL_MAXSIZE))
+    server = grpc.aio.server(options=get_server_options(reuse_port))
+    add_servicers(server, backend, asynchronous=True)
+
+    server.add_insecure_port(f'[::]:{port}')
+    await server.start()
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, lambda: asyncio.ensure_future(server.stop(GRACE_PERIOD)))
+    # The pre-warmer runs on its own thread, off the event loop
+    start_prewarm(watchlist, backend)
+    if ready is not None:
+        ready.set()
+    await server.wait_for_termination()
+
+def run_worker(backend_name: str, port: int, mode: str, ready, watchlist: str = None):
+    """
+    Entry point of a launcher worker process; the launcher handles Ctrl-C
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if mode == 'aio':
+        asyncio.run(serve_aio(backend_name, port, reuse_port=True, ready=ready, watchlist=watchlist))
+    else:
+        serve(backend_name, port, reuse_port=True, ready=ready, watchlist=watchlist)
+
+def wait_ready(worker, ready, timeout: float = GRACE_PERIOD) -> bool:
+    """
+    Waits until worker is listening, or has died or timed out
+    Returns True when it is listening
+    """
+    deadline = time.monotonic() + timeout
+    while not ready.wait(0.1) and worker.is_alive() and time.monotonic() < deadline:
+        pass
+    return ready.is_set()
+
+def stop_workers(workers, draining=()):
+    """
+    Stops workers, and waits for them and the already stopping draining ones to exit
+    """
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+    for worker in list(workers) + list(draining):
+        worker.join(GRACE_PERIOD + 5)
+        if worker.is_alive():
+            worker.kill()
+
+def serve_workers(processes: int, backend_name: str = GITHUB_BACKEND, port: int = 5005, mode: str = SERVER_MODE,
+                  watchlist: str = None):
+    """
+    Runs processes server workers on one port so scoring and JSON decoding use
+    every core, restarting any worker that dies
+    A worker that dies before it is ready is restarted with a growing delay,
+    and the launcher exits when no worker of a generation becomes ready or one
+    keeps failing to start
+    SIGHUP starts a new set of workers and, once they are listening, drains the
+    old ones; SIGTERM or Ctrl-C drains every worker and exits
+    Only the first worker pre-warms the watchlist, into the shared report store
+    Returns the launcher's exit status
+    """
+    # Workers share graded reports so a user crawled by one is not crawled by another
+    os.environ.setdefault("GRADER_REPORT_STORE", DEFAULT_REPORT_STORE)
+    # gRPC does not survive fork, so workers start from a fresh interpreter
+    context = multiprocessing.get_context('spawn')
+
+    def start_worker(index: int):
+        ready = context.Event()
+        worker = context.Process(target=run_worker, args=(backend_name, port, mode, ready,
+                                                          watchlist if index == 0 else None), daemon=False)
+        worker.start()
+        return worker, ready
+
+    def start_generation():
+        """
+        Returns the new workers, or None when none of them became ready
+        """
+        workers = [start_worker(index) for index in range(processes)]
+        if not any([wait_ready(worker, ready) for worker, ready in workers]):
+            stop_workers([worker for worker, _ in workers])
+            return None
+        return workers
+
+    signals = []
+    signal.signal(signal.SIGHUP, lambda *_: signals.append('restart'))
+    signal.signal(signal.SIGTERM, lambda *_: signals.append('stop'))
+    signal.signal(signal.SIGINT, lambda *_: signals.append('stop'))
+
+    current = start_generation()
+    if current is None:
+        print(f"Error starting server workers: none became ready on port {port}")
+        return 1
+    retired = []
+    failures = [0] * processes
+    restart_at = [None] * processes
+    status = 0
+    print(f"Serving on port {port} with {processes} {mode} workers (pid {os.getpid()})")
+    while True:
+        if 'stop' in signals:
+            break
+        if 'restart' in signals:
+            signals.clear()
+            print("Restarting workers")
+            replacement = start_generation()
+            if replacement is None:
+                # The running workers keep serving
+                print("Error restarting workers: none became ready, keeping the current ones")
+            else:
+                for worker, _ in current:
+                    worker.terminate()
+                retired.extend(worker for worker, _ in current)
+                current = replacement
+                failures = [0] * processes
+                restart_at = [None] * processes
+
+        now = time.monotonic()
+        for index, (worker, ready) in enumerate(current):
+            if restart_at[index] is not None:
+                if now >= restart_at[index]:
+                    restart_at[index] = None
+                    current[index] = start_worker(index)
+                continue
+            if worker.is_alive():
+                if ready.is_set():
+                    failures[index] = 0
+                continue
+            if ready.is_set():
+                print(f"Worker {worker.pid} exited with {worker.exitcode}, restarting")
+                current[index] = start_worker(index)
+                continue
+            failures[index] += 1
+            if failures[index] >= MAX_START_FAILURES:
+                print(f"Error starting worker {index}: failed {failures[index]} times in a row, stopping")
+                status = 1
+                break
+            delay = min(RESTART_BACKOFF * 2 ** (failures[index] - 1), RESTART_BACKOFF_MAX)
+            print(f"Worker {worker.pid} exited with {worker.exitcode} before it was ready, restarting in {delay:.0f}s")
+            restart_at[index] = now + delay
+        if status:
+            break
+        retired = [worker for worker in retired if worker.is_alive()]
+        time.sleep(0.5)
+
+    stop_workers([worker for worker, _ in current], retired)
+    return status
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Github Grader gRPC server")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=GITHUB_BACKEND,
+                        help="Github API backend used to collect metrics")
+    parser.add_argument('--mode', choices=['aio', 'thread'], default=SERVER_MODE,
+                        help="asyncio server, or the thread pool server as a fallback")
+    parser.add_argument('--processes', type=int, default=SERVER_PROCESSES,
+                        help="server processes sharing the port through SO_REUSEPORT")
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--watchlist', default=prewarm.WATCHLIST_PATH,
+                        help="file of usernames whose caches are kept warm in the background")
+    args = parser.parse_args()
+    if args.processes > 1:
+        sys.exit(serve_workers(args.processes, args.backend, args.port, args.mode, watchlist=args.watchlist))
+    elif args.mode == 'aio':
+        asyncio.run(serve_aio(args.backend, args.port, watchlist=args.watchlist))
+    else:
+        serve(args.backend, args.port, watchlist=args.watchlist)
@@ -0,0 +1,12 @@
+"""
+Username lists shared by the batch client and the server's pre-warmer
+"""
+
+def read_usernames(stream):
+    """
+    Yields one username per non-empty line, skipping # comments
+    """
+    for line in stream:
+        username = line.split('#', 1)[0].strip()
+        if username:
+            yield username